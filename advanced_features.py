@@ -1,24 +1,13 @@
-import re
 from fpdf import FPDF
+from skill_matcher import get_matcher
 
 def extract_skills(text):
-    # Basic keyword extraction for visualization
-    common_skills = [
-        "python", "java", "sql", "react", "aws", "docker", "kubernetes", "machine learning",
-        "data analysis", "project management", "communication", "leadership", "agile", "scrum",
-        "html", "css", "javascript", "typescript", "figma", "design", "marketing", "sales",
-        "finance", "accounting", "hr", "recruiting", "tensorflow", "pytorch", "pandas", "numpy",
-        "c++", "c", "c#", "ruby", "go", "rust", "tableau", "power bi", "excel"
-    ]
-    
-    found_skills = []
-    text_lower = text.lower()
-    
-    for skill in common_skills:
-        if re.search(r'\b' + re.escape(skill) + r'\b', text_lower):
-            found_skills.append(skill.title())
-            
-    return list(set(found_skills))
+    # Taxonomy-driven extraction: one compiled pass, aliases ("k8s", "postgres") map to canonical names
+    return get_matcher().extract(text)
+
+def match_skills(text):
+    """Canonical skills with categories, counts and character positions."""
+    return get_matcher().match(text)
 
 # --- PDF GENERATION WITH FULL REPORT ---
 
@@ -1,56 +1,395 @@
 import streamlit as st
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 import json
-import random
+import queue
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import database as db
+import key_pool as kp
+import response_cache as rc
+import telemetry
+import chat_context as cc
+import prompt_inputs as pi
+
+MODEL_NAME = 'gemini-2.5-flash-preview-09-2025'
+
+def get_api_keys():
+    keys = st.secrets["general"]["gemini_api_key"]
+    # Ensure keys is a list
+    if not isinstance(keys, list):
+        keys = [keys]
+    return list(keys)
+
+def is_rate_limit_error(e):
+    error_msg = str(e).lower()
+    return "429" in error_msg or "quota" in error_msg or "exhausted" in error_msg
+
+def release_outcome(error):
+    """KeyPool.release outcome for a finished request that raised `error` (None if it succeeded)."""
+    if error is None: return "ok"
+    return "rate_limited" if is_rate_limit_error(error) else "error"
+
+# --- HELPER: PROCESS-WIDE KEY POOL ---
+_key_pool = None
+_key_pool_lock = threading.Lock()
+
+def build_model(api_key, model_name):
+    """
+    Creates a model bound to its own client, so no process-global genai.configure is needed.
+    google-generativeai has no public way to pass a client, so this sets the private
+    GenerativeModel._client (present in the 0.8 releases pinned in requirements.txt).
+    """
+    model = genai.GenerativeModel(model_name)
+    if not hasattr(model, "_client"):
+        raise RuntimeError("This google-generativeai version has no GenerativeModel._client; "
+                           "per-key clients need the version pinned in requirements.txt.")
+    model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+    return model
+
+def get_key_pool():
+    """Returns the shared KeyPool, rebuilding it only if the configured keys change."""
+    global _key_pool
+    keys = get_api_keys()
+    with _key_pool_lock:
+        if _key_pool is None or _key_pool.keys != keys:
+            try: rpm = int(st.secrets["general"].get("requests_per_minute", kp.DEFAULT_RPM))
+            except: rpm = kp.DEFAULT_RPM
+            _key_pool = kp.KeyPool(keys, build_model, rate_per_minute=rpm)
+        return _key_pool
+
+# --- HELPER: DEADLINES & HEDGED REQUESTS ---
+DEFAULT_DEADLINE = 90.0     # Seconds a prompt may take in total, retries on other keys included
+PROMPT_DEADLINES = {        # Short structured prompts should not hold a scan for minutes
+    "category_prompt": 15.0,
+    "authenticity_prompt": 30.0,
+    "ats_prompt": 45.0,
+    "email_prompt": 45.0,
+    "market_prompt": 60.0,
+    "chat_summary": 30.0,
+    "chat": 60.0,
+}
+HEDGE_PERCENTILE = 95       # A hedge is sent once a call outlives this percentile of its prompt's recent latency
+HEDGE_MIN_SAMPLES = 20      # Recent successful calls needed before a prompt is hedged
+HEDGE_MIN_DELAY = 1.0       # Never hedge sooner than this (seconds)
+LLM_WORKERS = 32            # Threads running Gemini requests; abandoned requests finish here
+
+_llm_calls = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="nexhire-llm")
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+def prompt_deadline(prompt_name):
+    """Seconds allowed for `prompt_name`; general.llm_deadline_seconds in secrets sets the default."""
+    try: default = float(st.secrets["general"].get("llm_deadline_seconds", DEFAULT_DEADLINE))
+    except: default = DEFAULT_DEADLINE
+    return PROMPT_DEADLINES.get(prompt_name, default)
+
+def hedging_enabled():
+    """Hedged requests cost extra quota, so they are off unless general.hedge_requests is set."""
+    try: return bool(st.secrets["general"].get("hedge_requests", False))
+    except: return False
+
+def hedge_delay(prompt_name, streaming=False):
+    """Seconds before a hedge is sent for `prompt_name`, or None (hedging off, or too little history)."""
+    if not hedging_enabled(): return None
+    recent = telemetry.recent_percentile(prompt_name, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, ttft=streaming)
+    return None if recent is None else max(HEDGE_MIN_DELAY, recent / 1000)
+
+def _attempt(pool, state, contents, generation_config, timeout):
+    """One request on `state`'s key; runs on the LLM thread pool."""
+    model = pool.get_model(state, MODEL_NAME)
+    return model.generate_content(contents=contents, generation_config=generation_config,
+                                  request_options={"timeout": timeout})
+
+def _submit_attempt(pool, state, contents, generation_config, timeout):
+    future = _llm_calls.submit(_attempt, pool, state, contents, generation_config, timeout)
+    # The key is freed when the request really ends, even if the caller has given up on it
+    def release(f):
+        pool.release(state, "cancelled" if f.cancelled() else release_outcome(f.exception()))
+    future.add_done_callback(release)
+    return future
+
+def _pump_stream(pool, state, contents, generation_config, timeout, events, stop):
+    """One streaming request on the LLM thread pool; hands chunks to `events` until `stop` is set."""
+    outcome = "ok"
+    try:
+        model = pool.get_model(state, MODEL_NAME)
+        for chunk in model.generate_content(contents=contents, generation_config=generation_config, stream=True,
+                                            request_options={"timeout": timeout}):
+            if stop.is_set(): return
+            events.put((state.id, "chunk", chunk))
+        events.put((state.id, "end", None))
+    except Exception as e:
+        outcome = release_outcome(e)
+        events.put((state.id, "error", e))
+    finally:
+        pool.release(state, outcome)
 
 # --- HELPER: SMART KEY ROTATION ---
-def generate_response_with_rotation(contents, generation_config=None):
+def generate_response_with_rotation(contents, generation_config=None, prompt_name="unknown", deadline=None):
     """
-    Tries to generate content using the list of API keys.
-    If one key hits a quota limit (429), it rotates to the next one.
+    Generates content on the least-loaded healthy API key.
+    If a key hits a quota limit (429), it is put on cooldown and the next healthy key is tried.
+    The whole call must finish within `deadline` seconds (default: prompt_deadline) or it raises
+    DeadlineExceeded. With hedging on, a second request goes to another healthy key once the call
+    outlives its prompt's recent p95, and the first response wins. Requests left behind are
+    abandoned; they finish in the background and free their key then.
+    Every call is recorded in the llm_calls metrics table under `prompt_name`.
     """
     try:
-        keys = st.secrets["general"]["gemini_api_key"]
-        # Ensure keys is a list
-        if not isinstance(keys, list):
-            keys = [keys]
-            
-        # Shuffle keys to distribute load across different scans
-        random.shuffle(keys)
+        pool = get_key_pool()
     except:
         # Fallback if secrets are missing
         st.error("🚨 API Keys missing in Secrets!")
         return None
 
     last_error = None
-    
-    for api_key in keys:
-        try:
-            # Configure with the current key
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-2.5-flash-preview-09-2025')
-            
-            # Attempt generation
-            response = model.generate_content(
-                contents=contents, 
-                generation_config=generation_config
-            )
-            return response
-            
-        except Exception as e:
-            error_msg = str(e).lower()
-            # If it's a Quota/Limit error, log it and TRY NEXT KEY
-            if "429" in error_msg or "quota" in error_msg or "exhausted" in error_msg:
-                last_error = e
-                continue 
-            else:
-                # If it's a logic error (like bad prompt), fail immediately
-                raise e
-    
-    # If we loop through ALL keys and they all fail
+    tried = set()
+    running = {}          # future -> KeyState
+    rate_limited = 0
+    hedged = False
+    hedge_at = None
+    hedge_after = hedge_delay(prompt_name)
+    started = time.perf_counter()
+    expires = time.monotonic() + (deadline or prompt_deadline(prompt_name))
+
+    try:
+        while time.monotonic() < expires:
+            if not running:
+                now = time.monotonic()
+                state = pool.acquire(exclude=tried, timeout=min(kp.ACQUIRE_TIMEOUT, expires - now))
+                if state is None: break
+                tried.add(state.id)
+                running[_submit_attempt(pool, state, contents, generation_config, expires - now)] = state
+                hedge_at = now + hedge_after if hedge_after is not None else None
+
+            wake = min(expires, hedge_at) if hedge_at else expires
+            done, _ = wait(running, timeout=max(0.0, wake - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                if hedge_at and time.monotonic() >= hedge_at:
+                    hedge_at = None
+                    # Only a key that can serve right now; a hedge that has to queue does not help
+                    state = pool.acquire(exclude=tried, timeout=0)
+                    if state is not None:
+                        tried.add(state.id)
+                        hedged = True
+                        running[_submit_attempt(pool, state, contents, generation_config, expires - time.monotonic())] = state
+                continue
+
+            for future in done:
+                state = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    response = future.result()
+                    try: output_text = response.text
+                    except ValueError: output_text = ""
+                    telemetry.record_call(prompt_name, started, 'hedged' if hedged else 'ok', state.id, rate_limited,
+                                          contents=contents, response=response, output_text=output_text)
+                    return response
+                last_error = error
+                # If it's a Quota/Limit error, the key rests and the next one is tried
+                if is_rate_limit_error(error):
+                    rate_limited += 1
+                    continue
+                # A logic error (like a bad prompt) fails the call, unless a hedge may still answer
+                if not running:
+                    telemetry.record_call(prompt_name, started, 'error', state.id, rate_limited, contents=contents, error=error)
+                    raise error
+    finally:
+        for future in running: future.cancel()
+
+    if time.monotonic() >= expires:
+        error = DeadlineExceeded(f"{prompt_name} did not finish within its deadline.")
+        telemetry.record_call(prompt_name, started, 'timeout', None, rate_limited, contents=contents, error=error)
+        raise error
+    # If every key is exhausted or resting
+    telemetry.record_call(prompt_name, started, 'exhausted', None, rate_limited, contents=contents, error=last_error)
     raise last_error if last_error else Exception("All API keys are exhausted or invalid.")
 
+def stream_response_with_rotation(contents, generation_config=None, prompt_name="unknown", deadline=None):
+    """
+    Streaming generate_response_with_rotation: yields response chunks as they arrive.
+    A key that hits a quota limit before its first chunk is rested and the next key is tried;
+    once output has started, errors go to the caller. The stream must end within `deadline`
+    seconds or DeadlineExceeded is raised. With hedging on, a second stream starts on another
+    healthy key when the first chunk is later than the prompt's recent p95 time to first chunk;
+    whichever produces a chunk first is kept and the other is stopped.
+    Recorded in llm_calls with time to first chunk.
+    """
+    try:
+        pool = get_key_pool()
+    except:
+        st.error("🚨 API Keys missing in Secrets!")
+        return
+
+    last_error = None
+    tried = set()
+    streams = {}          # key id -> stop Event
+    events = queue.Queue()
+    winner = None
+    rate_limited = 0
+    hedged = False
+    hedge_at = None
+    hedge_after = hedge_delay(prompt_name, streaming=True)
+    chunk = None
+    output = []
+    started = time.perf_counter()
+    first_chunk = None
+    expires = time.monotonic() + (deadline or prompt_deadline(prompt_name))
+
+    def start(state):
+        tried.add(state.id)
+        streams[state.id] = threading.Event()
+        _llm_calls.submit(_pump_stream, pool, state, contents, generation_config, expires - time.monotonic(),
+                          events, streams[state.id])
+
+    def record(status, key_id, error=None):
+        telemetry.record_call(prompt_name, started, status, key_id, rate_limited, contents=contents, response=chunk,
+                              output_text="".join(output), error=error, ttft=first_chunk)
+
+    try:
+        while time.monotonic() < expires:
+            if not streams:
+                state = pool.acquire(exclude=tried, timeout=min(kp.ACQUIRE_TIMEOUT, expires - time.monotonic()))
+                if state is None: break
+                start(state)
+                hedge_at = time.monotonic() + hedge_after if hedge_after is not None else None
+
+            wake = min(expires, hedge_at) if hedge_at and winner is None else expires
+            try:
+                key, kind, item = events.get(timeout=max(0.0, wake - time.monotonic()))
+            except queue.Empty:
+                if hedge_at and winner is None and time.monotonic() >= hedge_at:
+                    hedge_at = None
+                    state = pool.acquire(exclude=tried, timeout=0)
+                    if state is not None:
+                        hedged = True
+                        start(state)
+                continue
+            # Leftovers from a stream that lost the race
+            if winner is not None and key != winner: continue
+
+            if kind == "chunk":
+                if winner is None:
+                    winner, first_chunk = key, time.perf_counter()
+                    for other, stop in streams.items():
+                        if other != key: stop.set()
+                chunk = item
+                output.append(chunk_text(chunk))
+                yield chunk
+                continue
+
+            streams.pop(key).set()
+            if kind == "end":
+                # The last chunk carries the usage metadata for the whole response
+                record('hedged' if hedged else 'ok', key)
+                return
+            last_error = item
+            if winner is None and is_rate_limit_error(item):
+                rate_limited += 1
+                continue
+            # Before any output, another stream of this call may still succeed
+            if winner is None and streams: continue
+            record('error', key, item)
+            raise item
+    except GeneratorExit:
+        record('cancelled', winner)
+        raise
+    finally:
+        # Also runs when the consumer stops reading early
+        for stop in streams.values(): stop.set()
+
+    if time.monotonic() >= expires:
+        error = DeadlineExceeded(f"{prompt_name} did not finish within its deadline.")
+        record('timeout', winner, error)
+        raise error
+    telemetry.record_call(prompt_name, started, 'exhausted', None, rate_limited, contents=contents, error=last_error)
+    raise last_error if last_error else Exception("All API keys are exhausted or invalid.")
+
+def chunk_text(chunk):
+    # Chunks that only carry a finish reason or safety ratings have no text
+    try: return chunk.text
+    except ValueError: return ""
+
+# --- HELPER: PERSISTENT RESPONSE CACHE ---
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Process-wide cache shared by every session, stored next to nexhire.db."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = rc.ResponseCache(rc.default_cache_path(db.DB_PATH))
+        return _cache
+
+def generate_text(prompt_name, contents, generation_config=None, validate=None):
+    """
+    Returns the response text for a prompt, serving repeats from the cache.
+    If `validate` is given it must accept the text; failing output is never cached.
+    """
+    cache = get_response_cache()
+    key = rc.make_key(prompt_name, MODEL_NAME, generation_config, contents)
+    cached = cache.get(key, prompt_name)
+    if cached is not None:
+        return cached
+
+    response = generate_response_with_rotation(contents=contents, generation_config=generation_config, prompt_name=prompt_name)
+    if not response: return None
+
+    text = response.text
+    if validate: validate(text)
+    cache.set(key, prompt_name, text)
+    return text
+
+def stream_text(prompt_name, contents, generation_config=None):
+    """
+    Streaming generate_text: yields text chunks as they arrive and caches the full text at the end,
+    under the same key, so streamed and blocking calls share cache entries. A hit is yielded whole.
+    """
+    cache = get_response_cache()
+    key = rc.make_key(prompt_name, MODEL_NAME, generation_config, contents)
+    cached = cache.get(key, prompt_name)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    for chunk in stream_response_with_rotation(contents=contents, generation_config=generation_config, prompt_name=prompt_name):
+        text = chunk_text(chunk)
+        if text:
+            parts.append(text)
+            yield text
+    if parts: cache.set(key, prompt_name, "".join(parts))
+
+INCOMPLETE_NOTE = "\n\n_(Incomplete: the AI response was interrupted or ran out of time.)_"
+
+def _stream_or_fallback(chunks, empty_message, error_message):
+    """
+    Passes chunks through; if none arrive, yields the fallback the blocking function would return.
+    Output cut short by an error or deadline is marked as incomplete.
+    """
+    produced = False
+    try:
+        for chunk in chunks:
+            produced = True
+            yield chunk
+    except Exception:
+        yield INCOMPLETE_NOTE if produced else error_message
+        return
+    if not produced: yield empty_message
+
+def parse_json_text(text_out):
+    """Strips optional markdown fences and parses the model's JSON output."""
+    text_out = text_out.strip()
+    if "```json" in text_out:
+        text_out = text_out.split("```json")[1].split("```")[0]
+    elif "```" in text_out:
+        text_out = text_out.split("```")[1].split("```")[0]
+    return json.loads(text_out)
+
 def get_prompt(prompt_name):
     try:
         return st.secrets["prompts"][prompt_name]
@@ -64,116 +403,137 @@ def check_resume_authenticity(resume_text):
     if not sys_prompt: return {"human_score": 0, "verdict": "Error", "analysis": "Prompt Missing from Secrets."}
 
     try:
-        # Use Rotation Helper
-        response = generate_response_with_rotation(
-            contents=[{"role": "user", "parts": [{"text": f"{sys_prompt}\n\nRESUME TEXT:\n{resume_text[:4000]}"}]}],
-            generation_config={"response_mime_type": "application/json"}
+        # Use Rotation Helper (cached)
+        text_out = generate_text(
+            "authenticity_prompt",
+            contents=[{"role": "user", "parts": [{"text": f"{sys_prompt}\n\nRESUME TEXT:\n{pi.fit_resume('authenticity_prompt', resume_text)}"}]}],
+            generation_config={"response_mime_type": "application/json"},
+            validate=parse_json_text
         )
         
-        if not response: return {"human_score": 0, "verdict": "Error", "analysis": "API Error"}
-
-        text_out = response.text.strip()
-        if "```json" in text_out:
-            text_out = text_out.split("```json")[1].split("```")[0]
-        elif "```" in text_out:
-            text_out = text_out.split("```")[1].split("```")[0]
-            
-        return json.loads(text_out)
+        if not text_out: return {"human_score": 0, "verdict": "Error", "analysis": "API Error"}
+
+        return parse_json_text(text_out)
     except Exception as e:
         return {"human_score": 0, "verdict": "Error", "analysis": f"Analysis Failed: {str(e)}"}
 
+CATEGORY_FALLBACK = "General Professional"   # Shown when the category call fails; never worth caching
+
 def categorize_resume(resume_text):
     sys_prompt = get_prompt("category_prompt")
     if not sys_prompt: return "General Profile"
     
     try:
-        response = generate_response_with_rotation(
-            contents=f"{sys_prompt}\n\nResume Snippet:\n{resume_text[:2000]}"
+        text_out = generate_text(
+            "category_prompt",
+            contents=f"{sys_prompt}\n\nResume Snippet:\n{pi.fit_resume('category_prompt', resume_text)}"
         )
-        return response.text.strip() if response else "General Professional"
+        return text_out.strip() if text_out else CATEGORY_FALLBACK
     except:
-        return "General Professional"
+        return CATEGORY_FALLBACK
 
-def get_ats_score(resume_text, job_desc):
+def get_ats_analysis(resume_text, job_desc):
+    """
+    Single structured ATS call.
+    Returns {"score": int, "missing_keywords": list, "summary": str, "ok": bool}.
+    """
     sys_prompt = get_prompt("ats_prompt")
-    if not sys_prompt: return 0, []
+    if not sys_prompt: return {"score": 0, "missing_keywords": [], "summary": "Error: System Prompts Missing.", "ok": False}
 
     try:
-        full_prompt = f"{sys_prompt}\n\nRESUME:\n{resume_text}\n\nJOB DESCRIPTION:\n{job_desc}"
+        full_prompt = (f"{sys_prompt}\n\nRESUME:\n{pi.fit_resume('ats_prompt', resume_text, job_desc)}"
+                       f"\n\nJOB DESCRIPTION:\n{pi.fit_job('ats_prompt', job_desc)}")
         
-        response = generate_response_with_rotation(
+        text_out = generate_text(
+            "ats_prompt",
             contents=[{"role": "user", "parts": [{"text": full_prompt}]}],
-            generation_config={"response_mime_type": "application/json"}
+            generation_config={"response_mime_type": "application/json"},
+            validate=parse_json_text
         )
         
-        if not response: return 0, []
-
-        text_out = response.text.strip()
-        if "```json" in text_out:
-            text_out = text_out.split("```json")[1].split("```")[0]
-        elif "```" in text_out:
-            text_out = text_out.split("```")[1].split("```")[0]
-            
-        data = json.loads(text_out)
-        return int(data.get("score", 0)), data.get("missing_keywords", [])
+        if not text_out: return {"score": 0, "missing_keywords": [], "summary": "Analysis Failed.", "ok": False}
+
+        data = parse_json_text(text_out)
+        return {
+            "score": int(data.get("score", 0)),
+            "missing_keywords": data.get("missing_keywords", []),
+            "summary": data.get("summary", "Analysis failed."),
+            "ok": True
+        }
     except Exception as e:
-        return 0, []
+        return {"score": 0, "missing_keywords": [], "summary": "Could not generate feedback.", "ok": False}
+
+def get_ats_score(resume_text, job_desc):
+    analysis = get_ats_analysis(resume_text, job_desc)
+    return analysis["score"], analysis["missing_keywords"]
 
 def get_feedback(resume_text, job_desc):
-    sys_prompt = get_prompt("ats_prompt") 
-    if not sys_prompt: return "Error: System Prompts Missing."
+    return get_ats_analysis(resume_text, job_desc)["summary"]
 
-    try:
-        full_prompt = f"{sys_prompt}\n\nRESUME:\n{resume_text}\n\nJOB DESCRIPTION:\n{job_desc}"
-        
-        response = generate_response_with_rotation(
-            contents=[{"role": "user", "parts": [{"text": full_prompt}]}],
-            generation_config={"response_mime_type": "application/json"}
-        )
-        
-        if not response: return "Analysis Failed."
-
-        text_out = response.text.strip()
-        if "```json" in text_out:
-            text_out = text_out.split("```json")[1].split("```")[0]
-        elif "```" in text_out:
-            text_out = text_out.split("```")[1].split("```")[0]
-            
-        data = json.loads(text_out)
-        return data.get("summary", "Analysis failed.")
-    except:
-        return "Could not generate feedback."
+# Prompt bodies are shared by the blocking and streaming variants so both hit the same cache entries
+def _cover_letter_contents(sys_prompt, resume_text, job_desc):
+    resume_text, job = pi.fit_resume("cover_letter_prompt", resume_text, job_desc), pi.fit_job("cover_letter_prompt", job_desc)
+    return f"{sys_prompt}\n\nCandidate Resume: {resume_text}\n\nTarget Job: {job}"
+
+def _interview_contents(sys_prompt, resume_text, job_desc):
+    resume_text, job = pi.fit_resume("interview_prompt", resume_text, job_desc), pi.fit_job("interview_prompt", job_desc)
+    return f"{sys_prompt}\n\nResume: {resume_text}\n\nJob: {job}"
+
+def _roadmap_contents(sys_prompt, resume_text, job_desc):
+    resume_text, job = pi.fit_resume("roadmap_prompt", resume_text, job_desc), pi.fit_job("roadmap_prompt", job_desc)
+    return f"{sys_prompt}\n\nResume: {resume_text}\nJob Description: {job}"
 
 def generate_cover_letter(resume_text, job_desc):
     sys_prompt = get_prompt("cover_letter_prompt")
     if not sys_prompt: return "Cover Letter Module Locked."
     try:
-        response = generate_response_with_rotation(
-            contents=f"{sys_prompt}\n\nCandidate Resume: {resume_text}\n\nTarget Job: {job_desc}"
+        text_out = generate_text(
+            "cover_letter_prompt",
+            contents=_cover_letter_contents(sys_prompt, resume_text, job_desc)
         )
-        return response.text if response else "Error generating draft."
+        return text_out if text_out else "Error generating draft."
     except:
         return "Could not generate draft."
 
+def stream_cover_letter(resume_text, job_desc):
+    """Streaming generate_cover_letter: yields the draft in chunks."""
+    sys_prompt = get_prompt("cover_letter_prompt")
+    if not sys_prompt:
+        yield "Cover Letter Module Locked."
+        return
+    yield from _stream_or_fallback(stream_text("cover_letter_prompt", contents=_cover_letter_contents(sys_prompt, resume_text, job_desc)),
+                                   "Error generating draft.", "Could not generate draft.")
+
 def generate_interview_questions(resume_text, job_desc):
     sys_prompt = get_prompt("interview_prompt")
     if not sys_prompt: return "Interview Module Locked."
     try:
-        response = generate_response_with_rotation(
-            contents=f"{sys_prompt}\n\nResume: {resume_text}\n\nJob: {job_desc}"
+        text_out = generate_text(
+            "interview_prompt",
+            contents=_interview_contents(sys_prompt, resume_text, job_desc)
         )
-        return response.text if response else "Error generating questions."
+        return text_out if text_out else "Error generating questions."
     except:
         return "Could not generate questions."
 
+def stream_interview_questions(resume_text, job_desc):
+    """Streaming generate_interview_questions: yields the questions in chunks."""
+    sys_prompt = get_prompt("interview_prompt")
+    if not sys_prompt:
+        yield "Interview Module Locked."
+        return
+    yield from _stream_or_fallback(stream_text("interview_prompt", contents=_interview_contents(sys_prompt, resume_text, job_desc)),
+                                   "Error generating questions.", "Could not generate questions.")
+
 def get_market_analysis(resume_text, role):
     sys_prompt = get_prompt("market_prompt")
     if not sys_prompt: return "Market Analysis Module Locked."
     try:
-        response = generate_response_with_rotation(
-            contents=f"{sys_prompt}\n\nJob Role: {role}\nResume Context: {resume_text[:2000]}"
+        text_out = generate_text(
+            "market_prompt",
+            contents=f"{sys_prompt}\n\nJob Role: {role}\nResume Context: {pi.fit_resume('market_prompt', resume_text, role)}"
         )
-        return response.text if response else "Market analysis unavailable."
+        return text_out if text_out else "Market analysis unavailable."
     except:
         return "Market analysis unavailable."
 
@@ -181,24 +541,135 @@ def generate_learning_roadmap(resume_text, job_desc):
     sys_prompt = get_prompt("roadmap_prompt")
     if not sys_prompt: return "Roadmap Module Locked."
     try:
-        response = generate_response_with_rotation(
-            contents=f"{sys_prompt}\n\nResume: {resume_text}\nJob Description: {job_desc}"
+        text_out = generate_text(
+            "roadmap_prompt",
+            contents=_roadmap_contents(sys_prompt, resume_text, job_desc)
         )
-        return response.text if response else "Roadmap unavailable."
+        return text_out if text_out else "Roadmap unavailable."
     except:
         return "Roadmap unavailable."
 
+def stream_learning_roadmap(resume_text, job_desc):
+    """Streaming generate_learning_roadmap: yields the plan in chunks."""
+    sys_prompt = get_prompt("roadmap_prompt")
+    if not sys_prompt:
+        yield "Roadmap Module Locked."
+        return
+    yield from _stream_or_fallback(stream_text("roadmap_prompt", contents=_roadmap_contents(sys_prompt, resume_text, job_desc)),
+                                   "Roadmap unavailable.", "Roadmap unavailable.")
+
 def generate_email_draft(resume_text, role, email_type):
     sys_prompt = get_prompt("email_prompt")
     if not sys_prompt: return "Email Module Locked."
     try:
-        response = generate_response_with_rotation(
-            contents=f"{sys_prompt}\n\nEmail Type: {email_type}\nRole: {role}\nResume Context: {resume_text[:1000]}"
+        text_out = generate_text(
+            "email_prompt",
+            contents=f"{sys_prompt}\n\nEmail Type: {email_type}\nRole: {role}\nResume Context: {pi.fit_resume('email_prompt', resume_text, role)}"
         )
-        return response.text if response else "Email draft unavailable."
+        return text_out if text_out else "Email draft unavailable."
     except:
         return "Email draft unavailable."
     
+# --- PARALLEL FULL SCAN ---
+# Stage name -> label shown while it runs
+SCAN_STAGES = {
+    'ats': "ATS Match Score & Feedback",
+    'cover_letter': "Cover Letter",
+    'interview_q': "Interview Questions",
+    'market_analysis': "Market Value",
+    'roadmap': "Learning Roadmap",
+}
+
+# What each stage returns when its call fails or its module is not configured
+SCAN_FALLBACKS = frozenset({
+    "Cover Letter Module Locked.", "Error generating draft.", "Could not generate draft.",
+    "Interview Module Locked.", "Error generating questions.", "Could not generate questions.",
+    "Market Analysis Module Locked.", "Market analysis unavailable.",
+    "Roadmap Module Locked.", "Roadmap unavailable.",
+})
+
+def stage_succeeded(name, result):
+    """False for a stage result that is a fallback (failed ATS call, "unavailable" text, cut-short stream)."""
+    if name == 'ats': return bool(result.get('ok'))
+    return bool(result) and result not in SCAN_FALLBACKS and not result.endswith(INCOMPLETE_NOTE)
+
+def run_full_scan(resume_text, job_desc, job_role, on_progress=None, on_chunk=None, on_stage=None, completed=None):
+    """
+    Fires the independent full-scan generators together on a thread pool.
+    `on_progress(label, done, total)` is called from the calling thread as each stage finishes,
+    so it is safe to update Streamlit elements from it.
+    With `on_chunk(label, text)`, the long-form stages stream and each chunk is handed to the
+    calling thread as it arrives.
+    `on_stage(name, result)` receives each stage's result as it finishes (also on the calling
+    thread), and stages already in `completed` ({name: result}) are not run again, so a
+    background job can checkpoint and resume a scan.
+    Every stage is bounded by its prompt deadline and falls back to its "unavailable" text.
+    If the caller stops early (e.g. a Streamlit rerun interrupts a callback), stages that have
+    not started are cancelled and streaming stages stop at their next chunk.
+    Returns the same result dict the sequential scan produced.
+    """
+    labels = SCAN_STAGES
+    stages = {
+        'ats': (labels['ats'], lambda: get_ats_analysis(resume_text, job_desc)),
+        'cover_letter': (labels['cover_letter'], lambda: generate_cover_letter(resume_text, job_desc)),
+        'interview_q': (labels['interview_q'], lambda: generate_interview_questions(resume_text, job_desc)),
+        'market_analysis': (labels['market_analysis'], lambda: get_market_analysis(resume_text, job_role)),
+        'roadmap': (labels['roadmap'], lambda: generate_learning_roadmap(resume_text, job_desc)),
+    }
+    # Worker threads only post events; every callback runs on the calling thread
+    events = queue.Queue()
+    cancelled = threading.Event()
+
+    if on_chunk:
+        def streamed(name, chunks):
+            def run():
+                parts = []
+                stream = chunks(resume_text, job_desc)
+                try:
+                    for chunk in stream:
+                        if cancelled.is_set(): break
+                        parts.append(chunk)
+                        events.put(("chunk", name, chunk))
+                finally:
+                    # Closing the generator cancels the request behind it
+                    stream.close()
+                return "".join(parts)
+            return run
+        stages['cover_letter'] = (stages['cover_letter'][0], streamed('cover_letter', stream_cover_letter))
+        stages['interview_q'] = (stages['interview_q'][0], streamed('interview_q', stream_interview_questions))
+        stages['roadmap'] = (stages['roadmap'][0], streamed('roadmap', stream_learning_roadmap))
+
+    outputs = {name: result for name, result in (completed or {}).items() if name in stages}
+    pending = [name for name in stages if name not in outputs]
+    pool = ThreadPoolExecutor(max_workers=max(len(pending), 1), thread_name_prefix="nexhire-scan")
+    try:
+        for name in pending:
+            pool.submit(stages[name][1]).add_done_callback(lambda future, name=name: events.put(("done", name, future)))
+        done = len(outputs)
+        while done < len(stages):
+            kind, name, payload = events.get()
+            if kind == "chunk":
+                on_chunk(stages[name][0], payload)
+                continue
+            outputs[name] = payload.result()
+            done += 1
+            if on_stage: on_stage(name, outputs[name])
+            if on_progress: on_progress(stages[name][0], done, len(stages))
+    finally:
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    ats = outputs['ats']
+    return {
+        'score': ats['score'],
+        'missing_keywords': ats['missing_keywords'],
+        'feedback': ats['summary'],
+        'cover_letter': outputs['cover_letter'],
+        'interview_q': outputs['interview_q'],
+        'market_analysis': outputs['market_analysis'],
+        'roadmap': outputs['roadmap'],
+    }
+
 def validate_admin_login(username, password):
     try:
         secure_user = st.secrets["admin"]["username"]
@@ -210,31 +681,74 @@ def validate_admin_login(username, password):
         return False
 # --- ADD TO THE END OF ai_engine.py ---
 
-def get_chat_response(messages):
-    """
-    Handles the sidebar chat conversation context.
-    """
+def new_chat_context():
+    """Per-session NexBot context; the token budget can be set in secrets as general.chat_token_budget."""
+    try: budget = int(st.secrets["general"].get("chat_token_budget", cc.DEFAULT_BUDGET))
+    except: budget = cc.DEFAULT_BUDGET
+    return cc.ChatContext(budget=budget)
+
+def summarize_chat(summary, messages):
+    """Extends the rolling NexBot summary with turns that left the context window."""
+    transcript = "\n".join(f"{'Recruiter' if m['role'] == 'user' else 'NexBot'}: {m['content']}" for m in messages if m['content'])
+    prompt = (
+        "Update the running summary of a conversation between a recruiter and NexBot, a hiring assistant. "
+        "Keep candidate names, roles, scores, decisions and open questions; drop small talk. "
+        f"Reply with the updated summary only, in at most {cc.SUMMARY_WORDS} words.\n\n"
+        f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"
+    )
+    try:
+        return generate_text("chat_summary", contents=prompt)
+    except Exception:
+        return None
+
+def chat_seed():
     # System prompt to give NexBot its persona
     system_prompt = (
         "You are NexBot, the AI Recruitment Assistant for NexHire Platinum. "
         "Your goal is to assist recruiters with using this dashboard, analyzing candidates, "
         "and suggesting interview strategies. Be professional, concise, and helpful."
     )
-
-    contents = []
     # Seed the conversation with the persona
-    contents.append({"role": "user", "parts": [{"text": system_prompt}]})
-    contents.append({"role": "model", "parts": [{"text": "Hello! I am NexBot. How can I assist you with your hiring process today?"}]})
+    return [
+        {"role": "user", "parts": [{"text": system_prompt}]},
+        {"role": "model", "parts": [{"text": "Hello! I am NexBot. How can I assist you with your hiring process today?"}]},
+    ]
 
-    # Add conversation history
-    for msg in messages:
-        role = "user" if msg["role"] == "user" else "model"
-        if msg["content"]:
-            contents.append({"role": role, "parts": [{"text": msg["content"]}]})
+def record_prompt_tokens(context, response):
+    # Prefer the model's own count over the estimate when it reports one
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", 0):
+        context.last_tokens = usage.prompt_token_count
 
+def get_chat_response(messages, context=None):
+    """
+    Handles the sidebar chat conversation context.
+    `context` (see new_chat_context) keeps the request within its token budget across turns.
+    """
+    if context is None: context = new_chat_context()
     try:
+        contents = context.build(chat_seed(), messages, summarize_chat)
         # Re-use your existing rotation function for reliability
-        response = generate_response_with_rotation(contents=contents)
-        return response.text if response else "I'm having trouble connecting. Please check your internet or API limits."
+        response = generate_response_with_rotation(contents=contents, prompt_name="chat")
+        if not response: return "I'm having trouble connecting. Please check your internet or API limits."
+        record_prompt_tokens(context, response)
+        return response.text
     except Exception as e:
         return f"I encountered an error: {str(e)}"
+
+def stream_chat_response(messages, context=None):
+    """Streaming get_chat_response: yields the reply in chunks as Gemini produces it."""
+    if context is None: context = new_chat_context()
+    produced = False
+    try:
+        contents = context.build(chat_seed(), messages, summarize_chat)
+        for chunk in stream_response_with_rotation(contents=contents, prompt_name="chat"):
+            record_prompt_tokens(context, chunk)
+            text = chunk_text(chunk)
+            if text:
+                produced = True
+                yield text
+    except Exception as e:
+        if not produced: yield f"I encountered an error: {str(e)}"
+        return
+    if not produced: yield "I'm having trouble connecting. Please check your internet or API limits."
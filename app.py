@@ -3,8 +3,43 @@ import pandas as pd
 import database as db
 import ai_engine as ai
 import advanced_features as af
-import PyPDF2
+import batch_rank
+import bulk_export
+import pdf_extract
+import write_behind
+import telemetry
+import scan_jobs
 import time
+import io
+import os
+import tempfile
+from profile_cache import ProfileCache, content_hash
+from report_cache import ReportCache
+from scan_jobs import ScanJobManager
+
+ADMIN_PAGE_SIZE = 25       # Rows per admin console page
+ADMIN_SEARCH_LIMIT = 200   # Ranked search results shown at once
+
+@st.cache_resource
+def get_profile_cache():
+    """Extracted text + category per uploaded file, shared across reruns and sessions."""
+    return ProfileCache()
+
+@st.cache_resource
+def get_report_cache():
+    """Rendered PDF reports keyed by a hash of the analysis, shared across reruns and sessions."""
+    return ReportCache()
+
+@st.cache_resource
+def get_scan_jobs():
+    """Background full-scan jobs, shared across reruns and sessions."""
+    return ScanJobManager()
+
+def report_args(res, job_role):
+    # Argument order of af.generate_pdf_report
+    return (st.session_state['username'], job_role, res['score'], res['feedback'], res['resume_skills'], res['missing_keywords'],
+            res['category'], res['interview_q'], res['market_analysis'], res['roadmap'])
+
 def setup_page():
     st.set_page_config(page_title="NexHire Platinum", page_icon="💜", layout="wide")
     st.markdown("""
@@ -153,6 +188,8 @@ def render_sidebar():
         # 1. Initialize Chat History
         if "messages" not in st.session_state:
             st.session_state.messages = []
+        if "chat_context" not in st.session_state:
+            st.session_state.chat_context = ai.new_chat_context()
 
         # 2. Chat History Display (Scrollable)
         chat_container = st.container(height=350) # Increased height slightly
@@ -175,16 +212,17 @@ def render_sidebar():
                 with st.chat_message("user"):
                     st.markdown(prompt)
 
-            # B. Get AI Response
-            with st.spinner("Thinking..."):
-                # Call the AI function
-                response = ai.get_chat_response(st.session_state.messages)
-            
-            # C. Display AI Response
-            st.session_state.messages.append({"role": "assistant", "content": response})
+            # B. Stream the AI Response as it is generated
             with chat_container:
                 with st.chat_message("assistant", avatar="chat.png"): # Use icon for response too
-                    st.markdown(response)
+                    response = st.write_stream(ai.stream_chat_response(st.session_state.messages, st.session_state.chat_context))
+
+            # C. Keep it in the history
+            st.session_state.messages.append({"role": "assistant", "content": response})
+        chat_stats = st.session_state.chat_context.stats()
+        if chat_stats['tokens']:
+            st.caption(f"Context: {chat_stats['tokens']:,} / {chat_stats['budget']:,} tokens sent"
+                       + (f" · {chat_stats['summarized_messages']} earlier messages summarized" if chat_stats['summarized_messages'] else ""))
         # --- CHATBOT SECTION END ---
 
         st.divider()
@@ -244,6 +282,47 @@ def login_page():
             st.caption("© 2025 NexHire Systems")
             st.markdown("</div>", unsafe_allow_html=True)
 
+@st.fragment(run_every=scan_jobs.POLL_INTERVAL)
+def scan_job_panel(job_id):
+    """Progress of a background scan; re-polls on its own without rerunning the page."""
+    jobs = get_scan_jobs()
+    job = jobs.status(job_id, st.session_state['username'])
+    if job is None or job['status'] not in db.ACTIVE_JOB_STATUSES:
+        # Finished: a full rerun shows the results
+        st.rerun()
+    with st.container(border=True):
+        st.markdown("### NexHire Intelligence Engine")
+        st.progress(job['done'] / job['total'], text=f"{job['done']}/{job['total']} stages complete")
+        st.caption("The scan runs in the background: refreshing or leaving this page won't lose any work.")
+        for name, label in ai.SCAN_STAGES.items():
+            if name in job['stages']:
+                st.write(f"✅ {label} ready")
+            elif label in job['drafts']:
+                # Live previews of the long-form drafts while they are written
+                with st.expander(f"{label} (live)", expanded=True):
+                    st.markdown(job['drafts'][label])
+            else:
+                st.write(f"⏳ {label}...")
+        if st.button("Cancel Scan", key="cancel_scan"):
+            jobs.cancel(job_id)
+
+def scan_result(job):
+    """analysis_result for a finished scan job, rebuilt entirely from what the job stored."""
+    stages = job['stages']
+    return {
+        'score': stages['ats']['score'],
+        'feedback': stages['ats']['summary'],
+        'resume_skills': af.extract_skills(job['resume_text']),
+        'job_skills': af.extract_skills(job['job_desc']),
+        'missing_keywords': stages['ats']['missing_keywords'],
+        'cover_letter': stages['cover_letter'],
+        'interview_q': stages['interview_q'],
+        'market_analysis': stages['market_analysis'],
+        'roadmap': stages['roadmap'],
+        'category': job['category'],
+        'job_role': job['job_role'],
+    }
+
 def dashboard_page():
     c_left, c_right = st.columns([6, 1])
     with c_left:
@@ -258,10 +337,11 @@ def dashboard_page():
         if st.button("Sign Out"):
             st.session_state['logged_in'] = False
             # Clear session state on logout
-            keys_to_remove = ['analysis_result', 'analysis_complete']
+            keys_to_remove = ['analysis_result', 'analysis_complete', 'scan_job', 'scan_job_loaded']
             for key in keys_to_remove:
                 if key in st.session_state:
                     del st.session_state[key]
+            st.query_params.clear()
             st.rerun()
     st.divider()
 
@@ -269,47 +349,157 @@ def dashboard_page():
         st.markdown("### Super Admin Console")
         st.info("Full Access to User Data, Resumes, and AI Outputs.")
         with st.expander("View Full Database (Click to Expand)", expanded=True):
-            all_data = db.get_all_full_analysis()
-            if all_data:
-                df = pd.DataFrame(all_data, columns=['ID', 'User', 'Role', 'Resume', 'JD', 'Score', 'Feedback', 'Cover Letter', 'Interview', 'Market', 'Roadmap', 'Date'])
-                st.dataframe(df[['ID', 'Date', 'User', 'Role', 'Score']], use_container_width=True)
+            f1, f2, f3 = st.columns([2, 2, 3])
+            with f1: f_user = st.text_input("User", key="adm_user")
+            with f2: f_role = st.text_input("Role", key="adm_role")
+            with f3: f_dates = st.date_input("Date Range", value=[], key="adm_dates")
+            s1, s2 = st.columns([3, 1])
+            with s1: search_q = st.text_input("Search resumes, job descriptions and feedback", placeholder='e.g. Kubernetes "machine learning"', key="adm_search")
+            with s2: score_range = st.slider("Score Range", 0, 100, (0, 100), key="adm_score")
+            filters = {
+                'username': f_user.strip() or None,
+                'job_role': f_role.strip() or None,
+                'date_from': f_dates[0] if len(f_dates) > 0 else None,
+                'date_to': f_dates[1] if len(f_dates) > 1 else None,
+                'min_score': score_range[0] if score_range[0] > 0 else None,
+                'max_score': score_range[1] if score_range[1] < 100 else None,
+            }
+            # Page cursors: (date, id) of the last row of each previous page; any filter change starts over
+            filter_key = (search_q, tuple(filters.values()))
+            if st.session_state.get('adm_filter_key') != filter_key:
+                st.session_state['adm_filter_key'] = filter_key
+                st.session_state['adm_cursors'] = [None]
+            cursors = st.session_state['adm_cursors']
+            if search_q.strip():
+                rows = db.search_full_analysis(search_q, limit=ADMIN_SEARCH_LIMIT, **filters)
+                st.caption(f"{len(rows)} matching records (best match first)")
+            else:
+                rows = db.list_full_analysis(limit=ADMIN_PAGE_SIZE + 1, after=cursors[-1], **filters)
+                has_next = len(rows) > ADMIN_PAGE_SIZE
+                rows = rows[:ADMIN_PAGE_SIZE]
+                p1, p2, p3 = st.columns([1, 4, 1])
+                with p1:
+                    if st.button("◀ Newer", disabled=len(cursors) == 1, key="adm_prev"):
+                        cursors.pop()
+                        st.rerun()
+                with p2: st.caption(f"Page {len(cursors)}")
+                with p3:
+                    if st.button("Older ▶", disabled=not has_next, key="adm_next"):
+                        cursors.append((rows[-1][1], rows[-1][0]))
+                        st.rerun()
+            if rows:
+                listing = pd.DataFrame(rows, columns=['ID', 'Date', 'User', 'Role', 'Score'])
+                st.dataframe(listing, use_container_width=True)
                 st.divider()
                 st.markdown("### Deep Inspection")
-                selected_id = st.selectbox("Select an ID to inspect full details:", df['ID'])
-                if selected_id:
-                    record = df[df['ID'] == selected_id].iloc[0]
-                    st.success(f"Inspecting Record #{selected_id} | User: {record['User']}")
+                selected_id = st.selectbox("Select an ID to inspect full details:", listing['ID'])
+                # Only the selected record's bodies are read from the database
+                record = db.get_full_analysis(int(selected_id)) if selected_id else None
+                if record:
+                    st.success(f"Inspecting Record #{selected_id} | User: {record['username']}")
                     with st.expander("Resume & Job Description (Inputs)"):
                         c1, c2 = st.columns(2)
                         with c1: 
                             st.caption("Resume Text")
-                            st.text_area("Resume", record['Resume'], height=200, key="adm_res")
+                            st.text_area("Resume", record['resume_text'], height=200, key="adm_res")
                         with c2: 
                             st.caption("Job Description")
-                            st.text_area("JD", record['JD'], height=200, key="adm_jd")
+                            st.text_area("JD", record['job_desc'], height=200, key="adm_jd")
                     with st.expander("AI Feedback & Analysis (Outputs)"):
-                        st.metric(label="Match Score", value=f"{record['Score']}%")
+                        st.metric(label="Match Score", value=f"{record['score']}%")
                         st.markdown("---")
-                        st.markdown(record['Feedback'])
+                        st.markdown(record['feedback'])
                     with st.expander("Generated Content (Drafts)"):
                         t1, t2, t3, t4 = st.tabs(["Cover Letter", "Interview Qs", "Market Data", "Roadmap"])
-                        with t1: st.text_area("Cover Letter", record['Cover Letter'], key="adm_cl")
-                        with t2: st.markdown(record['Interview'])
-                        with t3: st.markdown(record['Market'])
-                        with t4: st.markdown(record['Roadmap'])
+                        with t1: st.text_area("Cover Letter", record['cover_letter'], key="adm_cl")
+                        with t2: st.markdown(record['interview_questions'])
+                        with t3: st.markdown(record['market_analysis'])
+                        with t4: st.markdown(record['roadmap'])
+            elif any(v is not None for v in filters.values()) or search_q.strip():
+                st.warning("No records match these filters.")
             else:
                 st.warning("No analysis data recorded yet.")
+        with st.expander("LLM Latency & Quota Burn"):
+            window = st.selectbox("Window", [1, 7, 30], index=1, format_func=lambda d: f"Last {d} day{'s' if d > 1 else ''}", key="adm_llm_window")
+            llm_report = telemetry.latency_report(days=window)
+            if llm_report:
+                st.caption("Per prompt, slowest p95 first. Latency covers successful calls including key rotation; tokens include failures.")
+                st.dataframe(pd.DataFrame(llm_report), use_container_width=True, hide_index=True)
+            else:
+                st.info("No LLM calls recorded in this window.")
+        with st.expander("AI Response Cache"):
+            cache_stats = ai.get_response_cache().stats()
+            st.metric(label="Cached Responses", value=cache_stats['entries'])
+            if cache_stats['prompts']:
+                st.dataframe(pd.DataFrame([{'Prompt': name, 'Hits': c['hits'], 'Misses': c['misses']} for name, c in cache_stats['prompts'].items()]), use_container_width=True)
+        with st.expander("Bulk Report Export"):
+            # Uses the filters from the database view above; search terms are not applied
+            export_total = db.count_full_analysis(**filters)
+            st.caption(f"{export_total} records match the current User / Role / Date / Score filters.")
+            if st.button(f"Export {export_total} Reports as ZIP", disabled=export_total == 0, key="adm_export"):
+                old_zip = st.session_state.pop('adm_export_zip', None)
+                if old_zip and os.path.exists(old_zip): os.remove(old_zip)
+                fd, zip_path = tempfile.mkstemp(suffix=".zip", prefix="nexhire_reports_")
+                os.close(fd)
+                export_bar = st.progress(0, text="Rendering reports...")
+                export = bulk_export.export_reports(zip_path, on_progress=lambda done, total: export_bar.progress(done / max(total, 1), text=f"Rendering reports... {done}/{total}"), **filters)
+                export_bar.empty()
+                st.session_state['adm_export_zip'] = zip_path
+                st.success(f"{export['exported']} reports exported in {export['elapsed_s']}s ({export['per_minute']} reports/min), {export['failed']} failed.")
+            zip_path = st.session_state.get('adm_export_zip')
+            if zip_path and os.path.exists(zip_path):
+                with open(zip_path, 'rb') as f:
+                    st.download_button("Download Reports ZIP", data=f, file_name="NexHire_Reports.zip", mime="application/zip", key="adm_export_dl")
+        with st.expander("PDF Report Cache"):
+            report_stats = get_report_cache().stats()
+            p1, p2, p3, p4 = st.columns(4)
+            with p1: st.metric(label="Cached Reports", value=report_stats['entries'])
+            with p2: st.metric(label="Cache Hits", value=report_stats['hits'])
+            with p3: st.metric(label="Renders", value=report_stats['renders'])
+            with p4: st.metric(label="Avg Render", value=f"{report_stats['avg_render_ms']} ms")
+        with st.expander("Write-Behind Queue"):
+            writer_stats = write_behind.get_writer().stats()
+            w1, w2, w3, w4 = st.columns(4)
+            with w1: st.metric(label="Queue Depth", value=writer_stats['depth'])
+            with w2: st.metric(label="Events Written", value=writer_stats['written'])
+            with w3: st.metric(label="Transactions", value=writer_stats['batches'])
+            with w4: st.metric(label="Last Flush", value=f"{writer_stats['last_flush_ms']} ms")
+            if writer_stats['failed']: st.error(f"{writer_stats['failed']} events failed to persist.")
+        with st.expander("Background Scan Jobs"):
+            job_stats = get_scan_jobs().stats()
+            j1, j2, j3, j4 = st.columns(4)
+            with j1: st.metric(label="Running", value=f"{job_stats['running']} / {job_stats['workers']}")
+            with j2: st.metric(label="Completed", value=job_stats['completed'])
+            with j3: st.metric(label="Reattached", value=job_stats['reattached'])
+            with j4: st.metric(label="Resumed After Restart", value=job_stats['resumed'])
+            if job_stats['failed'] or job_stats['cancelled']:
+                st.caption(f"{job_stats['failed']} failed, {job_stats['cancelled']} cancelled since the server started.")
+        with st.expander("API Key Pool Health"):
+            try: st.dataframe(pd.DataFrame(ai.get_key_pool().snapshot()), use_container_width=True)
+            except: st.warning("API Keys missing in Secrets!")
         st.divider()
 
     history = db.fetch_history(st.session_state['username'])
+    stats = db.get_scan_stats(st.session_state['username'])
     last_score = history[0][3] if history else 0
-    m1, m2 = st.columns(2)
+    m1, m2, m3, m4 = st.columns(4)
     with m1:
         with st.container(border=True):
             st.metric(label="LATEST SCORE", value=f"{last_score}%", delta="Most Recent Scan")
     with m2:
         with st.container(border=True):
-            st.metric(label="TOTAL SCANS", value=len(history), delta="Lifetime Usage")
+            st.metric(label="TOTAL SCANS", value=stats['total'], delta="Lifetime Usage")
+    with m3:
+        with st.container(border=True):
+            st.metric(label="AVERAGE SCORE", value=f"{stats['average']}%", delta="All Scans")
+    with m4:
+        with st.container(border=True):
+            st.metric(label="BEST SCORE", value=f"{stats['best']}%", delta="Top Match")
+    role_activity = db.get_scans_per_role(st.session_state['username'])
+    if role_activity:
+        with st.expander("Scan Activity by Role (Last 30 Days)"):
+            activity = pd.DataFrame(role_activity, columns=['Day', 'Role', 'Scans', 'Avg Score'])
+            st.bar_chart(activity.pivot_table(index='Day', columns='Role', values='Scans', aggfunc='sum').fillna(0))
     st.write("")
     
     col_main, col_side = st.columns([2, 1])
@@ -321,14 +511,50 @@ def dashboard_page():
             category = "Manual Entry"
             
             if uploaded_file:
-                with st.spinner("Extracting text..."):
-                    reader = PyPDF2.PdfReader(uploaded_file)
-                    for page in reader.pages: resume_text += page.extract_text()
-                
-                with st.spinner("Categorizing profile..."):
-                    category = ai.categorize_resume(resume_text)
+                # Reruns (tab clicks, typing in the JD box) hit the cache: no PDF parsing, no LLM call
+                profiles = get_profile_cache()
+                file_bytes = uploaded_file.getvalue()
+                file_hash = content_hash(file_bytes)
+                profile = profiles.get(file_hash)
+                if profile is None:
+                    progress = st.progress(0.0, text="Extracting text...")
+                    try:
+                        resume_text = pdf_extract.extract_text(
+                            file_bytes,
+                            on_page=lambda done, total: progress.progress(done / total, text=f"Extracting text... page {done}/{total}")
+                        )
+                        # Cached even when empty, so a scanned PDF is not re-parsed on every rerun
+                        profile = {"text": resume_text, "category": None, "pages": pdf_extract.count_pages(file_bytes)}
+                        profiles.put(file_hash, profile)
+                    except pdf_extract.PdfLimitError as e:
+                        st.error(f"Could not process this PDF. {e}")
+                    progress.empty()
+
+                # Files whose categorization failed this session; retried only from the button below
+                failed = st.session_state.setdefault('category_failed', set())
+                if profile and profile["text"] and profile["category"] is None and file_hash not in failed:
+                    with st.spinner("Categorizing profile..."):
+                        category = ai.categorize_resume(profile["text"])
+                    if category == ai.CATEGORY_FALLBACK:
+                        # Not cached: another session (or a retry) may still get the real category
+                        failed.add(file_hash)
+                    else:
+                        profile = dict(profile, category=category)
+                        profiles.put(file_hash, profile)
+
+                if profile and profile["pages"] > pdf_extract.MAX_PAGES:
+                    st.warning(f"This PDF has {profile['pages']} pages; only the first {pdf_extract.MAX_PAGES} were analysed.")
+                if profile and not profile["text"]:
+                    st.warning("No text could be extracted from this PDF (it may be a scanned image). Paste the resume text instead.")
+                elif profile:
+                    resume_text, category = profile["text"], profile["category"] or ai.CATEGORY_FALLBACK
                     st.success("Resume Extracted & Categorized!")
                     st.markdown(f"<span class='category-badge'>{category}</span>", unsafe_allow_html=True)
+                    if file_hash in failed and profile["category"] is None:
+                        st.caption("The AI service did not respond, so the category is a placeholder.")
+                        if st.button("Retry Categorization"):
+                            failed.discard(file_hash)
+                            st.rerun()
             else: 
                 resume_text = st.text_area("Or paste raw text", height=200, placeholder="Paste resume content here...")
 
@@ -367,7 +593,7 @@ def dashboard_page():
         if resume_text and job_desc:
             with st.spinner("Calculating ATS Match Score..."):
                 score, missing_keywords = ai.get_ats_score(resume_text, job_desc)
-                db.save_scan(st.session_state['username'], job_role, score)
+                write_behind.save_scan(st.session_state['username'], job_role, score)
                 st.divider()
                 st.markdown("### ATS Score Analysis")
                 q1, q2 = st.columns([1, 2])
@@ -381,48 +607,38 @@ def dashboard_page():
         else:
              st.warning("Please provide both a Resume and a Job Description.")
 
-    # --- FULL SCAN LOGIC (PERSISTENT STATE) ---
+    # --- FULL SCAN LOGIC (BACKGROUND JOB) ---
+    jobs = get_scan_jobs()
+    username = st.session_state['username']
     if run_full_scan:
         if resume_text and job_desc:
-            with st.status("Launching NexHire Intelligence Engine...", expanded=True) as status:
-                st.warning("Please wait! This deep analysis may take 1-2 minutes. Do not refresh the page.")
-                st.write("Analyzing Resume & Job Description...")
-                
-                score, missing_keywords = ai.get_ats_score(resume_text, job_desc)
-                feedback = ai.get_feedback(resume_text, job_desc)
-                
-                resume_skills = af.extract_skills(resume_text)
-                job_skills = af.extract_skills(job_desc)
-                
-                st.write("Drafting Cover Letter & Interview Questions...")
-                cover_letter = ai.generate_cover_letter(resume_text, job_desc)
-                interview_q = ai.generate_interview_questions(resume_text, job_desc)
-                
-                st.write("Calculating Market Value & Learning Roadmap...")
-                market_analysis = ai.get_market_analysis(resume_text, job_role)
-                roadmap = ai.generate_learning_roadmap(resume_text, job_desc)
-                
-                db.save_scan(st.session_state['username'], job_role, score)
-                db.save_full_analysis(st.session_state['username'], job_role, resume_text, job_desc, score, feedback, cover_letter, interview_q, market_analysis, roadmap)
-                status.update(label="Analysis Complete!", state="complete", expanded=False)
-                
-                # STORE RESULTS IN SESSION STATE
-                st.session_state['analysis_complete'] = True
-                st.session_state['analysis_result'] = {
-                    'score': score,
-                    'feedback': feedback,
-                    'resume_skills': resume_skills,
-                    'job_skills': job_skills,
-                    'missing_keywords': missing_keywords,
-                    'cover_letter': cover_letter,
-                    'interview_q': interview_q,
-                    'market_analysis': market_analysis,
-                    'roadmap': roadmap,
-                    'category': category
-                }
+            job_id = jobs.submit(username, job_role, resume_text, job_desc, category)
+            # The job id goes in the URL so a refresh reattaches to the same scan
+            st.session_state['scan_job'] = job_id
+            st.query_params['job'] = job_id
+            st.session_state['analysis_complete'] = False
         else:
             st.warning("Please provide both a Resume and a Job Description.")
 
+    job_id = st.session_state.get('scan_job') or st.query_params.get('job') or jobs.active_job(username)
+    if job_id and st.session_state.get('scan_job_loaded') != job_id:
+        job = jobs.status(job_id, username)
+        if job is None:
+            st.session_state.pop('scan_job', None)
+        elif job['status'] in db.ACTIVE_JOB_STATUSES:
+            st.session_state['scan_job'] = job_id
+            scan_job_panel(job_id)
+        else:
+            st.session_state['scan_job_loaded'] = job_id
+            if job['status'] == 'complete':
+                st.session_state['analysis_complete'] = True
+                st.session_state['analysis_result'] = scan_result(job)
+                if job['error']: st.warning(job['error'])
+                # Render the PDF now, off the request path, so the Download button is instant
+                get_report_cache().prefetch(*report_args(st.session_state['analysis_result'], job['job_role']))
+            else:
+                st.error(f"Scan {job['status']}: {job['error'] or 'stopped before all stages finished.'}")
+
     # --- DISPLAY RESULTS FROM SESSION STATE ---
     if st.session_state.get('analysis_complete', False) and 'analysis_result' in st.session_state:
         res = st.session_state['analysis_result']
@@ -440,20 +656,8 @@ def dashboard_page():
                     st.markdown("</div>", unsafe_allow_html=True)
                     st.write("")
                     
-                    # --- UPDATED PDF GENERATION CALL ---
-                    pdf_data = af.generate_pdf_report(
-                        st.session_state['username'], 
-                        job_role, 
-                        res['score'], 
-                        res['feedback'], 
-                        res['resume_skills'], 
-                        res['missing_keywords'], 
-                        res['category'],
-                        res['interview_q'],        # PASSED NEW DATA
-                        res['market_analysis'],    # PASSED NEW DATA
-                        res['roadmap']             # PASSED NEW DATA
-                    )
-                    # -----------------------------------
+                    # Cached by analysis hash: tab switches and reruns reuse the bytes rendered after the scan
+                    pdf_data = get_report_cache().get(*report_args(res, res['job_role']))
 
                     st.download_button("Download Report", data=pdf_data, file_name=f"NexHire_Report.pdf", mime="application/pdf")
             with r2:
@@ -499,6 +703,40 @@ def dashboard_page():
                             email_draft = ai.generate_email_draft(resume_text, job_role, email_type)
                             st.text_area("Email Draft:", value=email_draft, height=250)
 
+    render_bulk_ranking(job_role, job_desc)
+
+def render_bulk_ranking(job_role, job_desc):
+    st.divider()
+    with st.expander("Bulk Candidate Ranking (Many Resumes vs. This Job Requisition)"):
+        st.caption("Upload PDFs or a .zip of PDFs. Results are checkpointed, so re-running the same batch resumes where it stopped.")
+        batch_files = st.file_uploader("Resumes", type=["pdf", "zip"], accept_multiple_files=True, label_visibility="collapsed", key="batch_uploader")
+        top_k = st.number_input("Send only the top K candidates (local pre-rank) to the AI scorer. 0 scores everyone.", min_value=0, value=0, step=5)
+        if st.button("Rank Candidates", disabled=not batch_files):
+            if not job_desc:
+                st.warning("Please paste a Job Description in the Job Requisition box first.")
+            else:
+                source = [(f.name, f.getvalue()) for f in batch_files]
+                progress = st.progress(0.0, text="Ranking candidates...")
+                summary = batch_rank.run_batch(
+                    source, job_desc, job_role=job_role, username=st.session_state['username'], top_k=int(top_k) or None,
+                    on_progress=lambda done, total, name: progress.progress(min(done / max(total, 1), 1.0), text=f"Scored {done}/{total}: {name}")
+                )
+                progress.empty()
+                st.session_state['batch_run'] = summary
+
+        summary = st.session_state.get('batch_run')
+        if summary:
+            b1, b2, b3, b4 = st.columns(4)
+            with b1: st.metric("Scored", summary['scored'], delta=f"{summary['skipped']} resumed from checkpoint")
+            with b2: st.metric("Filtered by Pre-rank", summary['filtered'])
+            with b3: st.metric("Failed", summary['failed'])
+            with b4: st.metric("Throughput", f"{summary['per_minute']} / min")
+            rows = batch_rank.ranked_rows(summary['run_id'])
+            st.dataframe(pd.DataFrame(rows, columns=batch_rank.CSV_COLUMNS), use_container_width=True, hide_index=True)
+            csv_buffer = io.StringIO()
+            batch_rank.write_csv(summary['run_id'], csv_buffer)
+            st.download_button("Download Ranked CSV", data=csv_buffer.getvalue(), file_name=f"NexHire_Ranking_{summary['run_id']}.csv", mime="text/csv")
+
 def main():
     setup_page()
     db.create_tables()
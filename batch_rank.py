@@ -0,0 +1,201 @@
+"""
+Bulk candidate ranking: score a folder or zip of resume PDFs against one job description.
+
+    python batch_rank.py resumes.zip --jd job.txt --role "Data Engineer" --out ranked.csv
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import database as db
+import ai_engine as ai
+import pdf_extract
+import prerank
+
+MAX_CONCURRENCY = 4   # LLM calls in flight for one bulk run
+CSV_COLUMNS = ['Rank', 'File', 'Score', 'Pre-rank', 'Missing Keywords', 'Summary', 'Status']
+
+def content_hash(data):
+    return hashlib.sha256(data if isinstance(data, bytes) else data.encode('utf-8')).hexdigest()
+
+def iter_pdfs(source):
+    """
+    Yields (file_name, pdf_bytes) one file at a time.
+    `source` is a folder path, a zip path / file object, or a list of (name, bytes) pairs.
+    """
+    if isinstance(source, (list, tuple)):
+        for name, data in source:
+            if name.lower().endswith('.zip'):
+                yield from iter_pdfs(io.BytesIO(data))
+            else:
+                yield name, data
+    elif isinstance(source, str) and os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith('.pdf'):
+                with open(os.path.join(source, name), 'rb') as f:
+                    yield name, f.read()
+    else:
+        with zipfile.ZipFile(source) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and info.filename.lower().endswith('.pdf'):
+                    yield os.path.basename(info.filename), zf.read(info)
+
+def _zip_pdf_count(source):
+    with zipfile.ZipFile(source) as zf:
+        return sum(1 for info in zf.infolist() if not info.is_dir() and info.filename.lower().endswith('.pdf'))
+
+def count_pdfs(source):
+    """Number of PDFs iter_pdfs(source) will yield; zips are counted from their directory, nothing is extracted."""
+    if isinstance(source, (list, tuple)):
+        return sum(_zip_pdf_count(io.BytesIO(data)) if name.lower().endswith('.zip') else 1 for name, data in source)
+    if isinstance(source, str) and os.path.isdir(source):
+        return sum(1 for name in os.listdir(source) if name.lower().endswith('.pdf'))
+    total = _zip_pdf_count(source)
+    if hasattr(source, 'seek'): source.seek(0)
+    return total
+
+def source_label(source):
+    """Stable identifier for a source so reruns of the same input resume the same run."""
+    if isinstance(source, (list, tuple)):
+        return "upload:" + content_hash("|".join(f"{name}:{len(data)}" for name, data in source))
+    return os.path.abspath(source) if isinstance(source, str) else "stream"
+
+def _score(file_name, file_hash, resume_text, job_desc, prerank_score):
+    analysis = ai.get_ats_analysis(resume_text, job_desc)
+    return file_name, file_hash, analysis, prerank_score
+
+def run_batch(source, job_desc, job_role="", username="batch", run_id=None, concurrency=MAX_CONCURRENCY, top_k=None, on_progress=None):
+    """
+    Streams PDFs from `source`, scores each against `job_desc` with bounded concurrency
+    and checkpoints every result, so calling again with the same inputs resumes where it stopped.
+    With `top_k`, every resume is first scored locally by prerank and only the best top_k
+    reach the LLM; the rest are stored as 'filtered' with their pre-rank score.
+    `on_progress(done, total, file_name)` is called from the calling thread after each resume,
+    `total` being the number of PDFs in `source` (zips included).
+    Returns a summary dict including throughput in resumes per minute.
+    """
+    jd_hash = content_hash(job_desc)
+    label = source_label(source)
+    if run_id is None:
+        run_id = db.find_open_batch_run(jd_hash, label) or db.create_batch_run(username, job_role, job_desc, jd_hash, label)
+    done_hashes = db.get_batch_done_hashes(run_id)
+
+    summary = {"run_id": run_id, "scored": 0, "failed": 0, "skipped": 0, "filtered": 0}
+    total = count_pdfs(source) if on_progress else 0
+    start = time.perf_counter()
+
+    def record(file_name, status):
+        summary[status] += 1
+        if on_progress: on_progress(sum(summary[k] for k in ('scored', 'failed', 'skipped', 'filtered')), total, file_name)
+
+    def extracted(skip_done):
+        seen = set()
+        for file_name, data in iter_pdfs(source):
+            file_hash = content_hash(data)
+            if file_hash in seen or (skip_done and file_hash in done_hashes):
+                record(file_name, 'skipped')
+                continue
+            seen.add(file_hash)
+            try:
+                resume_text = pdf_extract.extract_text(data)
+            except Exception as e:
+                db.save_batch_result(run_id, file_name, file_hash, 0, "[]", f"Extraction failed: {e}", 'failed')
+                record(file_name, 'failed')
+                continue
+            yield file_name, file_hash, resume_text
+
+    if top_k:
+        # Pre-rank everything (including already scored files) so a resumed run picks the same shortlist
+        docs = list(extracted(skip_done=False))
+        order, scores = prerank.shortlist([text for _, _, text in docs], job_desc, top_k)
+        shortlisted = set(order)
+        for i, (file_name, file_hash, _) in enumerate(docs):
+            if i not in shortlisted and file_hash not in done_hashes:
+                db.save_batch_result(run_id, file_name, file_hash, None, "[]", "Not shortlisted by the local pre-ranker.", 'filtered', float(scores[i]))
+                record(file_name, 'filtered')
+        queue = [docs[i] + (float(scores[i]),) for i in order]
+    else:
+        queue = (doc + (None,) for doc in extracted(skip_done=True))
+
+    def collect(finished):
+        for future in finished:
+            file_name, file_hash, analysis, prerank_score = future.result()
+            status = 'scored' if analysis['ok'] else 'failed'
+            db.save_batch_result(run_id, file_name, file_hash, analysis['score'], json.dumps(analysis['missing_keywords']), analysis['summary'], status, prerank_score)
+            record(file_name, status)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="nexhire-batch") as pool:
+        in_flight = set()
+        for file_name, file_hash, resume_text, prerank_score in queue:
+            if file_hash in done_hashes:
+                record(file_name, 'skipped')
+                continue
+
+            # Bounded: wait for a slot before extracting the next file
+            if len(in_flight) >= concurrency:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(finished)
+            in_flight.add(pool.submit(_score, file_name, file_hash, resume_text, job_desc, prerank_score))
+
+        collect(wait(in_flight).done)
+
+    # Runs with failures stay open so the next call retries only the failed files
+    db.finish_batch_run(run_id, 'complete' if summary['failed'] == 0 else 'partial')
+    elapsed = time.perf_counter() - start
+    summary["elapsed_s"] = round(elapsed, 2)
+    summary["per_minute"] = round((summary['scored'] + summary['failed'] + summary['filtered']) / elapsed * 60, 1) if elapsed > 0 else 0.0
+    return summary
+
+def ranked_rows(run_id):
+    """Ranked table for display / CSV export."""
+    rows = []
+    for rank, (file_name, score, prerank_score, missing, summary, status, date) in enumerate(db.fetch_batch_results(run_id), start=1):
+        rows.append({
+            'Rank': rank,
+            'File': file_name,
+            'Score': score,
+            'Pre-rank': prerank_score,
+            'Missing Keywords': ", ".join(json.loads(missing or "[]")),
+            'Summary': summary,
+            'Status': status,
+        })
+    return rows
+
+def write_csv(run_id, f):
+    writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    writer.writerows(ranked_rows(run_id))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank a folder or zip of resume PDFs against one job description.")
+    parser.add_argument("source", help="Folder of PDFs or a .zip archive")
+    parser.add_argument("--jd", required=True, help="Text file containing the job description")
+    parser.add_argument("--role", default="", help="Job role title")
+    parser.add_argument("--out", default="ranked.csv", help="CSV output path")
+    parser.add_argument("--run-id", type=int, help="Resume a specific run")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--top-k", type=int, help="Only send the best K resumes (by local pre-rank) to the LLM")
+    args = parser.parse_args(argv)
+
+    with open(args.jd, encoding='utf-8') as f:
+        job_desc = f.read()
+
+    db.create_tables()
+    summary = run_batch(args.source, job_desc, job_role=args.role, run_id=args.run_id, concurrency=args.concurrency, top_k=args.top_k,
+                        on_progress=lambda done, total, name: print(f"[{done}/{total}] {name}", file=sys.stderr))
+    with open(args.out, 'w', newline='', encoding='utf-8') as f:
+        write_csv(summary['run_id'], f)
+
+    print(f"Run #{summary['run_id']}: {summary['scored']} scored, {summary['filtered']} filtered by pre-rank, {summary['failed']} failed, "
+          f"{summary['skipped']} already done in {summary['elapsed_s']}s ({summary['per_minute']} resumes/min). "
+          f"Ranked table written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Per-rerun database overhead: the calls every dashboard rerun makes
+(create_tables, is_admin, fetch_history), with a fresh connection per call (before)
+versus the pooled, WAL-tuned connections (after).
+
+    python benchmarks/bench_db_overhead.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RERUNS = 500
+
+def rerun(db):
+    db.create_tables()
+    db.is_admin("recruiter")
+    db.fetch_history("recruiter")
+
+def measure(db, label):
+    rerun(db)  # Warm-up
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        rerun(db)
+    per_rerun = (time.perf_counter() - start) / RERUNS * 1000
+    print(f"{label:<40} {per_rerun:8.3f} ms/rerun")
+    return per_rerun
+
+def main():
+    tmp = tempfile.mkdtemp()
+    os.environ['NEXHIRE_DB'] = os.path.join(tmp, 'bench.db')
+    import database as db
+
+    db.create_tables()
+    db.add_user("recruiter", "password123")
+    for i in range(200):
+        db.save_scan("recruiter", "Engineer", i % 100)
+
+    pooled_connect, pooled_create = db.get_connection, db.create_tables
+
+    # Before: a new sqlite3 connection per call and the full schema DDL on every rerun
+    db.get_connection = lambda: sqlite3.connect(db.DB_PATH, check_same_thread=False)
+    def create_every_time():
+        db._tables_ready.discard(db.DB_PATH)
+        pooled_create()
+    db.create_tables = create_every_time
+    before = measure(db, "before: connect per call, DDL per rerun")
+
+    db.get_connection, db.create_tables = pooled_connect, pooled_create
+    after = measure(db, "after: pooled WAL connections")
+    print(f"speed-up: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+End-to-end LLM latency and throughput with a local Gemini stand-in (benchmarks/fake_genai.py):
+quick scan, full scan, NexBot chat and bulk scoring, with configurable latency, jitter and 429s.
+Results are written as JSON so two runs can be compared.
+
+    python benchmarks/bench_llm.py --latency 0.8 --jitter 0.2 --rate-limit 0.05 --out bench.json
+    python benchmarks/bench_llm.py --scenario full chat --compare bench.json
+    python benchmarks/bench_llm.py --stall 0.05 --hedge --compare bench.json
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+import fake_genai
+
+SCENARIOS = ["quick", "full", "chat", "bulk"]
+
+def resume(i):
+    return (f"Candidate {i}. Senior Data Engineer with {3 + i % 9} years of Python, SQL, Apache Spark and Airflow. "
+            f"Built streaming pipelines on AWS for client {i * 7919 % 1000}. ") * 20
+
+JOB = "Data Engineer: Python, SQL, Spark, Airflow, Kubernetes, Terraform, AWS. Own batch and streaming pipelines."
+
+def resume_pdf(i):
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    pdf.add_page()
+    pdf.multi_cell(0, 5, txt=resume(i))
+    return pdf.output(dest='S').encode('latin-1')
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    if samples.size == 0: return {}
+    return {f"p{p}_ms": round(float(np.percentile(samples, p)), 1) for p in (50, 95, 99)}
+
+def timed(items, fn):
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+# --- SCENARIOS ---
+# Each returns (items processed, per-item latencies in seconds, extra fields)
+
+def quick(ai, n):
+    return n, timed(range(n), lambda i: ai.get_ats_score(resume(i), JOB)), {}
+
+def full(ai, n):
+    return n, timed(range(n), lambda i: ai.run_full_scan(resume(i), JOB, "Data Engineer")), {}
+
+def chat(ai, n):
+    import chat_context as cc
+    context = cc.ChatContext()
+    messages = []
+    tokens = []
+    def turn(i):
+        messages.append({"role": "user", "content": f"Question {i}: how should I assess candidate {i} for the data role? " * 3})
+        messages.append({"role": "assistant", "content": ai.get_chat_response(messages, context)})
+        tokens.append(context.last_tokens)
+    latencies = timed(range(n), turn)
+    return n, latencies, {"tokens_first_turn": tokens[0], "tokens_last_turn": tokens[-1], "max_tokens": max(tokens),
+                          "summary_updates": context.summaries}
+
+def bulk(ai, n):
+    import batch_rank
+    source = [(f"candidate_{i}.pdf", resume_pdf(i)) for i in range(n)]
+    start = time.perf_counter()
+    summary = batch_rank.run_batch(source, JOB, job_role="Data Engineer")
+    # Bulk is measured as a whole; per-item latency is the mean
+    per_item = (time.perf_counter() - start) / max(n, 1)
+    return n, [per_item] * n, {"scored": summary["scored"], "failed": summary["failed"], "per_minute": summary["per_minute"]}
+
+def run_scenario(name, ai, backend, n):
+    # Every scenario starts cold: no cached responses, fresh key pool state
+    ai.get_response_cache().clear()
+    ai._key_pool = None
+    backend.reset()
+    start = time.perf_counter()
+    items, latencies, extra = globals()[name](ai, n)
+    wall = time.perf_counter() - start
+    counters = backend.counters()
+    pool = ai.get_key_pool().snapshot()
+    result = {
+        "items": items,
+        "wall_s": round(wall, 2),
+        "per_item": percentiles(latencies),
+        "llm_calls": counters["calls"],
+        "calls_per_item": round(counters["calls"] / max(items, 1), 2),
+        "input_tokens_per_item": round(counters["input_tokens"] / max(items, 1)),
+        "rate_limited": counters["rate_limited"],
+        "stalled": counters["stalled"],
+        "streamed_calls": counters["streamed"],
+        "calls_by_prompt": counters["by_prompt"],
+        "rotation": [{"key_id": k["key_id"], "served": k["served"], "rate_limited": k["rate_limited"]} for k in pool],
+    }
+    result.update(extra)
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)["results"]
+    print(f"\n{'scenario':<8} {'metric':<16} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline: continue
+        old = baseline[name]
+        for metric, before, after in [("wall_s", old["wall_s"], result["wall_s"]),
+                                      ("p50_ms", old["per_item"].get("p50_ms"), result["per_item"].get("p50_ms")),
+                                      ("p95_ms", old["per_item"].get("p95_ms"), result["per_item"].get("p95_ms")),
+                                      ("calls_per_item", old["calls_per_item"], result["calls_per_item"]),
+                                      ("tokens_per_item", old.get("input_tokens_per_item"), result["input_tokens_per_item"])]:
+            if before is None or after is None: continue
+            change = f"{(after - before) / before * 100:+.0f}%" if before else "n/a"
+            print(f"{name:<8} {metric:<16} {before:>10} {after:>10} {change:>8}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline LLM benchmarks against a fake Gemini backend.")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("-n", type=int, default=10, help="Scans / chat turns / resumes per scenario")
+    parser.add_argument("--latency", type=float, default=0.8, help="Mean seconds per fake Gemini call")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Std deviation of the latency")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Probability that a call returns 429")
+    parser.add_argument("--stall", type=float, default=0.0, help="Probability that a call takes 10x the latency")
+    parser.add_argument("--hedge", action="store_true", help="Enable hedged requests")
+    parser.add_argument("--deadline", type=float, default=None, help="Seconds allowed per LLM call (all prompts)")
+    parser.add_argument("--keys", type=int, default=3, help="Number of fake API keys in rotation")
+    parser.add_argument("--rpm", type=int, default=None, help="Per-key requests per minute for the key pool")
+    parser.add_argument("--out", default=None, help="Write results to this JSON file")
+    parser.add_argument("--compare", default=None, help="Print changes against a previous JSON result")
+    args = parser.parse_args(argv)
+
+    backend = fake_genai.install(fake_genai.FakeBackend(latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                                                        stall=args.stall))
+    tmp = tempfile.mkdtemp()
+    os.environ['NEXHIRE_DB'] = os.path.join(tmp, 'bench.db')
+
+    import database as db
+    import key_pool as kp
+    import ai_engine as ai
+    db.create_tables()
+    fake_genai.configure_ai(ai, args.keys)
+    if args.rpm: kp.DEFAULT_RPM = args.rpm
+    if args.hedge: ai.hedging_enabled = lambda: True
+    if args.deadline:
+        ai.DEFAULT_DEADLINE = args.deadline
+        ai.PROMPT_DEADLINES = {}
+
+    results = {}
+    print(f"{'scenario':<8} {'items':>6} {'wall_s':>8} {'p50_ms':>9} {'p95_ms':>9} {'calls/item':>11} {'429s':>6}")
+    for name in args.scenario:
+        result = results[name] = run_scenario(name, ai, backend, args.n)
+        print(f"{name:<8} {result['items']:>6} {result['wall_s']:>8} {result['per_item'].get('p50_ms', 0):>9} "
+              f"{result['per_item'].get('p95_ms', 0):>9} {result['calls_per_item']:>11} {result['rate_limited']:>6}")
+
+    if args.compare: compare(results, args.compare)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({"date": datetime.datetime.now().isoformat(timespec='seconds'), "revision": git_revision(),
+                       "config": vars(args), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+if __name__ == "__main__":
+    main()
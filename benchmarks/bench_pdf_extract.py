@@ -0,0 +1,59 @@
+"""
+Timing for resume text extraction on 1, 20 and 200 page PDFs.
+Compares the original single-threaded `+=` loop with pdf_extract.extract_text.
+
+    python benchmarks/bench_pdf_extract.py
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2
+from fpdf import FPDF
+import pdf_extract
+
+PAGE_COUNTS = [1, 20, 200]
+REPEATS = 3
+
+def make_pdf(pages):
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    line = "Senior Engineer - Python, SQL, Kubernetes, AWS. Led migration of 40 services to containers. "
+    for p in range(pages):
+        pdf.add_page()
+        pdf.multi_cell(0, 5, txt=f"Page {p + 1}\n" + line * 40)
+    return pdf.output(dest='S').encode('latin-1')
+
+def sequential(file_bytes):
+    text = ""
+    reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+    for page in reader.pages: text += page.extract_text()
+    return text
+
+def best_of(fn, file_bytes):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(file_bytes)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    pdf_extract.get_pool()  # Exclude worker start-up from the timings
+    print(f"{'pages':>6} {'size_kb':>8} {'sequential_ms':>14} {'pdf_extract_ms':>15} {'first_page_ms':>14}")
+    for pages in PAGE_COUNTS:
+        file_bytes = make_pdf(pages)
+        seq = best_of(sequential, file_bytes)
+        par = best_of(pdf_extract.extract_text, file_bytes)
+
+        start = time.perf_counter()
+        next(pdf_extract.iter_pages(file_bytes))
+        first = time.perf_counter() - start
+
+        print(f"{pages:>6} {len(file_bytes) // 1024:>8} {seq * 1000:>14.1f} {par * 1000:>15.1f} {first * 1000:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Local pre-ranker throughput on synthetic applicant pools.
+
+    python benchmarks/bench_prerank.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skill_matcher import load_taxonomy
+import prerank
+
+POOL_SIZES = [100, 1000, 5000]
+TOP_K = 50
+
+def synthetic_pool(n, seed=7):
+    rng = random.Random(seed)
+    skills = [s["name"] for s in load_taxonomy()]
+    filler = "delivered projects for clients across teams improving outcomes and reporting to leadership".split()
+    docs = []
+    for _ in range(n):
+        words = rng.sample(skills, 25) + [rng.choice(filler) for _ in range(600)]
+        rng.shuffle(words)
+        docs.append(" ".join(words))
+    jd = "Looking for a Data Engineer with Python, SQL, Apache Spark, Apache Airflow, AWS, Docker and Kubernetes."
+    return docs, jd
+
+def main():
+    print(f"{'resumes':>8} {'prerank_s':>10} {'per_1k_ms':>10} {'llm_calls_saved':>16}")
+    for n in POOL_SIZES:
+        docs, jd = synthetic_pool(n)
+        start = time.perf_counter()
+        order, _ = prerank.shortlist(docs, jd, TOP_K)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>8} {elapsed:>10.2f} {elapsed / n * 1000 * 1000:>10.1f} {n - len(order):>16}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Skill extraction latency as the taxonomy grows.
+Pads the shipped taxonomy with synthetic skills and times one match over a resume-sized text,
+next to the original per-skill re.search loop.
+
+    python benchmarks/bench_skill_matcher.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skill_matcher import SkillMatcher, load_taxonomy
+
+SIZES = [0, 2000, 10000, 50000]
+REPEATS = 20
+
+RESUME = (
+    "Senior Software Engineer with 8 years building Python and Go microservices on Kubernetes (k8s). "
+    "Designed PostgreSQL and Redis data layers, CI/CD with GitHub Actions and Terraform on AWS. "
+    "Led a team of 6, mentoring juniors; strong communication and stakeholder management. "
+    "Shipped ML features with PyTorch and scikit-learn, dashboards in Tableau and Power BI. "
+) * 12
+
+LEGACY_SKILLS = [
+    "python", "java", "sql", "react", "aws", "docker", "kubernetes", "machine learning",
+    "data analysis", "project management", "communication", "leadership", "agile", "scrum",
+    "html", "css", "javascript", "typescript", "figma", "design", "marketing", "sales",
+    "finance", "accounting", "hr", "recruiting", "tensorflow", "pytorch", "pandas", "numpy",
+    "c++", "c", "c#", "ruby", "go", "rust", "tableau", "power bi", "excel"
+]
+
+def legacy_extract(text):
+    text_lower = text.lower()
+    return [s for s in LEGACY_SKILLS if re.search(r'\b' + re.escape(s) + r'\b', text_lower)]
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS): fn()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+def main():
+    base = load_taxonomy()
+    print(f"legacy 39-skill loop: {timed(lambda: legacy_extract(RESUME)):.2f} ms/call")
+    print(f"{'skills':>7} {'compile_ms':>11} {'match_ms':>9} {'found':>6}")
+    for extra in SIZES:
+        skills = base + [{"name": f"Synthetic Skill {i:05d}", "aliases": [f"synskill{i}"]} for i in range(extra)]
+        start = time.perf_counter()
+        matcher = SkillMatcher(skills)
+        compile_ms = (time.perf_counter() - start) * 1000
+        found = len(matcher.match(RESUME))
+        print(f"{len(matcher):>7} {compile_ms:>11.1f} {timed(lambda: matcher.match(RESUME)):>9.2f} {found:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Offline stand-in for google.generativeai, for benchmarks that must run without API keys.
+install() registers it in sys.modules; call it before importing ai_engine.
+
+Prompts are expected to look like FAKE_PROMPT[<name>] (see prompt_for) so canned replies can be
+routed per prompt: JSON for the ATS / authenticity prompts, prose for everything else.
+"""
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import types
+
+_PROMPT = re.compile(r"FAKE_PROMPT\[(\w+)\]")
+_WORDS = ("candidate demonstrates strong experience with distributed systems and should prepare examples "
+          "of leading delivery under ambiguity while strengthening cloud cost ownership and stakeholder updates").split()
+
+def prompt_for(name):
+    return f"FAKE_PROMPT[{name}]"
+
+class RateLimitError(Exception):
+    pass
+
+class FakeBackend:
+    """
+    Shared behaviour of every fake model: latency (seconds, gaussian with `jitter`), the
+    probability that a call is rejected with a 429, the probability that it stalls for
+    `stall_factor` times the latency, and reply sizes. Counts every call it sees.
+    """
+    def __init__(self, latency=0.8, jitter=0.2, rate_limit=0.0, reply_words=250, stream_chunks=20, seed=7,
+                 stall=0.0, stall_factor=10):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.stall = stall
+        self.stall_factor = stall_factor
+        self.reply_words = reply_words
+        self.stream_chunks = stream_chunks
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.rate_limited = 0
+            self.streamed = 0
+            self.stalled = 0
+            self.input_tokens = 0
+            self.by_prompt = {}
+            self.by_key = {}
+
+    def _draw(self):
+        with self._lock:
+            delay = max(0.0, self._rng.gauss(self.latency, self.jitter))
+            if self._rng.random() < self.stall:
+                self.stalled += 1
+                delay *= self.stall_factor
+            return delay, self._rng.random()
+
+    def counters(self):
+        with self._lock:
+            return {"calls": self.calls, "rate_limited": self.rate_limited, "streamed": self.streamed,
+                    "stalled": self.stalled, "input_tokens": self.input_tokens, "by_prompt": dict(self.by_prompt), "by_key": dict(self.by_key)}
+
+    def reply(self, prompt_name, contents):
+        digest = int(hashlib.sha256(str(contents).encode('utf-8')).hexdigest()[:8], 16)
+        if prompt_name == "ats_prompt":
+            return json.dumps({"score": 40 + digest % 56, "missing_keywords": ["Kubernetes", "Terraform", "Go"][:digest % 4],
+                               "summary": " ".join(_WORDS[:20])})
+        if prompt_name == "authenticity_prompt":
+            return json.dumps({"human_score": 60 + digest % 40, "verdict": "Likely Human", "analysis": " ".join(_WORDS[:15])})
+        if prompt_name == "category_prompt":
+            return "Data Engineering"
+        return " ".join(_WORDS[i % len(_WORDS)] for i in range(self.reply_words))
+
+    def generate(self, api_key, contents, stream):
+        prompt = _PROMPT.search(str(contents))
+        prompt_name = prompt.group(1) if prompt else "chat"
+        delay, roll = self._draw()
+        prompt_tokens = len(str(contents)) // 4
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += prompt_tokens
+            self.by_prompt[prompt_name] = self.by_prompt.get(prompt_name, 0) + 1
+            self.by_key[api_key] = self.by_key.get(api_key, 0) + 1
+            limited = roll < self.rate_limit
+            if limited: self.rate_limited += 1
+            if stream: self.streamed += 1
+        if limited:
+            # Real 429s come back fast
+            time.sleep(min(delay, 0.05))
+            raise RateLimitError("429 Resource has been exhausted (e.g. check quota).")
+
+        text = self.reply(prompt_name, contents)
+        usage = types.SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=len(text) // 4)
+        if not stream:
+            time.sleep(delay)
+            return FakeResponse(text, usage)
+        return self._stream(text, usage, delay)
+
+    def _stream(self, text, usage, delay):
+        # First chunk after a quarter of the latency, the rest spread over the remainder
+        step = max(1, len(text) // self.stream_chunks)
+        pieces = [text[i:i + step] for i in range(0, len(text), step)]
+        time.sleep(delay / 4)
+        for i, piece in enumerate(pieces):
+            if i: time.sleep(delay * 0.75 / len(pieces))
+            yield FakeResponse(piece, usage if i == len(pieces) - 1 else None)
+
+class FakeResponse:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+BACKEND = FakeBackend()
+
+class GenerativeModel:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+        self._client = GenerativeServiceClient()
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        return BACKEND.generate(self._client.api_key, contents, stream)
+
+class GenerativeServiceClient:
+    def __init__(self, client_options=None, **kwargs):
+        self.api_key = (client_options or {}).get("api_key", "default")
+
+def configure(**kwargs):
+    pass
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+def install(backend=None):
+    """Registers the fake modules and returns the backend they share."""
+    global BACKEND
+    if backend is not None: BACKEND = backend
+    genai = _module("google.generativeai", GenerativeModel=GenerativeModel, configure=configure)
+    glm = _module("google.ai.generativelanguage", GenerativeServiceClient=GenerativeServiceClient)
+    google = sys.modules.get("google") or _module("google", __path__=[])
+    google_ai = _module("google.ai", __path__=[], generativelanguage=glm)
+    google.generativeai = genai
+    google.ai = google_ai
+    sys.modules.update({"google": google, "google.ai": google_ai,
+                        "google.generativeai": genai, "google.ai.generativelanguage": glm})
+    return BACKEND
+
+def configure_ai(ai, key_count=3):
+    """Points an imported ai_engine at fake keys and FAKE_PROMPT prompts instead of st.secrets."""
+    keys = [f"bench-key-{i}" for i in range(key_count)]
+    ai.get_api_keys = lambda: keys
+    ai.get_prompt = prompt_for
+    return keys
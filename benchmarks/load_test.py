@@ -0,0 +1,260 @@
+"""
+Concurrent-session load test: N simulated recruiters drive app.py through
+login -> upload -> full scan -> report download with Streamlit's AppTest,
+against the fake Gemini backend (benchmarks/fake_genai.py) and a temporary database.
+Reports per-step latency percentiles, SQLite write-lock waits and memory per session.
+
+    python benchmarks/load_test.py --sessions 8 --latency 0.8 --out load.json
+
+AppTest cannot drive st.file_uploader, so the upload step pastes the resume text
+(extracted from a generated PDF) into the raw-text box instead. AppTest also swaps a
+process-wide Runtime singleton on every run, so each session runs in its own process.
+That gives every session its own write-behind queue: SQLite sees N writers where the
+real server has one, so the lock-wait figures are an upper bound.
+"""
+import argparse
+import datetime
+import json
+import multiprocessing as mp
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import fake_genai
+
+APP = os.path.join(ROOT, "app.py")
+STEPS = ["login", "upload", "full_scan", "download"]
+POLL_INTERVAL = 0.25 # Seconds between reruns while a scan job runs (the page itself polls every second)
+LOCK_WAIT_MS = 20   # A write statement slower than this was waiting on the SQLite write lock
+WRITE_VERBS = {"INSERT", "UPDATE", "DELETE", "REPLACE", "COMMIT"}
+JOB = "Data Engineer: Python, SQL, Spark, Airflow, Kubernetes, Terraform, AWS. Own batch and streaming pipelines."
+
+# --- SQLITE WRITE TIMING ---
+
+class WriteTimer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = []
+        self.locked_errors = 0
+
+    def record(self, sql, seconds):
+        words = sql.split(None, 1)
+        if words and words[0].upper() in WRITE_VERBS:
+            with self._lock: self.samples.append(seconds * 1000)
+
+TIMER = WriteTimer()
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e): TIMER.locked_errors += 1
+            raise
+        finally:
+            TIMER.record(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            TIMER.record(sql, time.perf_counter() - start)
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            TIMER.record("COMMIT", time.perf_counter() - start)
+
+def instrument_sqlite():
+    """Makes every later sqlite3.connect() (database, response_cache) time its writes."""
+    connect = sqlite3.connect
+    def timed_connect(*args, **kwargs):
+        kwargs.setdefault("factory", TimedConnection)
+        return connect(*args, **kwargs)
+    sqlite3.connect = timed_connect
+
+def write_report(samples, locked_errors):
+    samples = np.array(samples)
+    waits = samples[samples > LOCK_WAIT_MS]
+    return {"writes": int(samples.size), "lock_waits": int(waits.size), "lock_wait_total_ms": round(float(waits.sum()), 1),
+            "write_p95_ms": round(float(np.percentile(samples, 95)), 2) if samples.size else None,
+            "write_max_ms": round(float(samples.max()), 2) if samples.size else None,
+            "locked_errors": locked_errors}
+
+# --- SESSIONS ---
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        # Peak rather than current outside Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def resume_text(i):
+    from fpdf import FPDF
+    import pdf_extract
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    pdf.add_page()
+    pdf.multi_cell(0, 5, txt=(f"Candidate {i}. Senior Data Engineer with {3 + i % 9} years of Python, SQL, Spark and Airflow. "
+                              f"Built streaming pipelines on AWS for client {i * 7919 % 1000}. ") * 20)
+    return pdf_extract.extract_text(pdf.output(dest='S').encode('latin-1'))
+
+def drive(i, resume, timeout, timings, errors):
+    from streamlit.testing.v1 import AppTest
+
+    def step(name, action):
+        start = time.perf_counter()
+        at = action()
+        timings[name] = time.perf_counter() - start
+        errors.extend(f"{name}: {e.message}" for e in at.exception)
+
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.run()
+    at.text_input(key="login_user").input(f"recruiter{i}")
+    at.text_input(key="login_pass").input("password123")
+    step("login", lambda: [b for b in at.button if b.label == "Access Dashboard"][0].click().run())
+
+    [t for t in at.text_area if t.label == "Or paste raw text"][0].input(resume)
+    [t for t in at.text_input if t.label == "Role Title"][0].input("Data Engineer")
+    [t for t in at.text_area if t.label == "Requirements"][0].input(JOB)
+    step("upload", at.run)
+
+    def full_scan():
+        [b for b in at.button if b.label == "Initialize Intelligence Engine"][0].click().run()
+        # The scan runs as a background job; poll like the page's progress fragment does
+        give_up = time.perf_counter() + timeout
+        while not any(d.label == "Download Report" for d in at.get("download_button")) and time.perf_counter() < give_up:
+            time.sleep(POLL_INTERVAL)
+            at.run()
+        return at
+    step("full_scan", full_scan)
+
+    step("download", at.run)
+    if not any(d.label == "Download Report" for d in at.get("download_button")):
+        errors.append("download: no report button")
+    return at
+
+def run_session(i, config, gate, results):
+    """One simulated user in its own process; waits on `gate` so all sessions start together."""
+    fake_genai.install(fake_genai.FakeBackend(latency=config["latency"], jitter=config["jitter"],
+                                              rate_limit=config["rate_limit"], seed=i))
+    instrument_sqlite()
+    timings, errors = {}, []
+    try:
+        import ai_engine as ai
+        import write_behind
+        from streamlit.testing.v1 import AppTest
+        fake_genai.configure_ai(ai, config["keys"])
+        resume = resume_text(i)
+        # One throwaway render loads the app's imports and Streamlit's script runner,
+        # so the memory delta below is the session's own state
+        AppTest.from_file(APP, default_timeout=config["timeout"]).run()
+        base = rss_mb()
+        gate.wait()
+        time.sleep(i * config["ramp"])
+        at = drive(i, resume, config["timeout"], timings, errors)
+        write_behind.get_writer().flush()
+        # `at` still holds the session state, so it counts towards the delta
+        memory = rss_mb() - base
+        del at
+    except Exception:
+        errors.append("driver: " + traceback.format_exc(limit=3))
+        memory = None
+    results.put({"session": i, "timings": timings, "errors": errors, "memory_mb": memory,
+                 "writes": TIMER.samples, "locked_errors": TIMER.locked_errors})
+
+def summarize(sessions):
+    steps = {}
+    for name in STEPS:
+        samples = np.array([s["timings"][name] for s in sessions if name in s["timings"]]) * 1000
+        if samples.size:
+            steps[name] = {"n": int(samples.size), **{f"p{p}_ms": round(float(np.percentile(samples, p)), 1) for p in (50, 95, 99)},
+                           "max_ms": round(float(samples.max()), 1)}
+    return steps
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive N concurrent app sessions against a fake Gemini backend.")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds between session starts")
+    parser.add_argument("--latency", type=float, default=0.8, help="Mean seconds per fake Gemini call")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Std deviation of the latency")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Probability that a call returns 429")
+    parser.add_argument("--keys", type=int, default=3, help="Number of fake API keys per session")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds one AppTest run may take")
+    parser.add_argument("--out", default=None, help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp()
+    os.environ['NEXHIRE_DB'] = os.path.join(tmp, 'load.db')
+    import database as db
+    db.create_tables()
+    for i in range(args.sessions):
+        db.add_user(f"recruiter{i}", "password123")
+
+    ctx = mp.get_context("spawn")
+    gate, results = ctx.Event(), ctx.Queue()
+    config = {"latency": args.latency, "jitter": args.jitter, "rate_limit": args.rate_limit, "keys": args.keys,
+              "timeout": args.timeout, "ramp": args.ramp}
+    procs = [ctx.Process(target=run_session, args=(i, config, gate, results), name=f"session-{i}")
+             for i in range(args.sessions)]
+    for proc in procs: proc.start()
+    # Sessions start once every process has been spawned
+    start = time.perf_counter()
+    gate.set()
+    sessions = sorted((results.get() for _ in procs), key=lambda s: s["session"])
+    wall = time.perf_counter() - start
+    for proc in procs: proc.join()
+
+    memory = [s["memory_mb"] for s in sessions if s["memory_mb"] is not None]
+    report = {
+        "sessions": args.sessions,
+        "wall_s": round(wall, 2),
+        "steps": summarize(sessions),
+        "sqlite": write_report([ms for s in sessions for ms in s["writes"]], sum(s["locked_errors"] for s in sessions)),
+        "memory": {"per_session_mb": round(float(np.mean(memory)), 2) if memory else None,
+                   "max_session_mb": round(max(memory), 2) if memory else None},
+        "errors": {s["session"]: s["errors"] for s in sessions if s["errors"]},
+    }
+
+    print(f"{args.sessions} sessions in {report['wall_s']}s")
+    print(f"{'step':<10} {'n':>4} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'max_ms':>9}")
+    for name, s in report["steps"].items():
+        print(f"{name:<10} {s['n']:>4} {s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9} {s['max_ms']:>9}")
+    sq = report["sqlite"]
+    print(f"\nSQLite: {sq['writes']} writes, {sq['lock_waits']} over {LOCK_WAIT_MS} ms ({sq['lock_wait_total_ms']} ms waiting), "
+          f"p95 {sq['write_p95_ms']} ms, max {sq['write_max_ms']} ms, {sq['locked_errors']} 'database is locked' errors")
+    mem = report["memory"]
+    print(f"Memory: {mem['per_session_mb']} MB per session (max {mem['max_session_mb']} MB)")
+    for i, errs in report["errors"].items():
+        print(f"session {i}: " + "; ".join(errs))
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({"date": datetime.datetime.now().isoformat(timespec='seconds'), "config": vars(args), **report}, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Bulk export of stored analyses as PDF reports, streamed into one zip archive.
+
+    python bulk_export.py --out reports.zip --role "Data Engineer" --from 2025-01-01 --min-score 60
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import database as db
+import advanced_features as af
+
+PAGE_SIZE = 500                        # Summary rows fetched per keyset page
+MAX_WORKERS = os.cpu_count() or 1      # FPDF is pure Python, so one process per core
+IN_FLIGHT_PER_WORKER = 2               # Rendered PDFs waiting to be zipped stay bounded
+_UNSAFE = re.compile(r'[^A-Za-z0-9._-]+')
+
+def iter_analysis_ids(page_size=PAGE_SIZE, **filters):
+    """Ids of every matching analysis, newest first, one keyset page at a time."""
+    after = None
+    while True:
+        rows = db.list_full_analysis(limit=page_size, after=after, **filters)
+        for row in rows:
+            yield row[0]
+        if len(rows) < page_size: return
+        after = (rows[-1][1], rows[-1][0])
+
+def report_args(record):
+    """generate_pdf_report arguments rebuilt from a stored full_analysis record."""
+    resume_skills = af.extract_skills(record['resume_text'] or "")
+    matched = set(resume_skills)
+    missing = [s for s in af.extract_skills(record['job_desc'] or "") if s not in matched]
+    # The profile category is not stored with the analysis
+    return (record['username'], record['job_role'], record['score'], record['feedback'] or "", resume_skills, missing,
+            "Not recorded", record['interview_questions'] or "", record['market_analysis'] or "", record['roadmap'] or "")
+
+def report_name(record):
+    return f"{record['id']:06d}_{_UNSAFE.sub('_', record['username'] or 'user')}_{_UNSAFE.sub('_', record['job_role'] or 'role')}.pdf"
+
+def _init_worker(db_path):
+    db.DB_PATH = db_path
+
+def _render(analysis_id):
+    # Runs in a worker process: it loads its own record, so only ids and finished PDFs cross processes
+    record = db.get_full_analysis(analysis_id)
+    if record is None: return analysis_id, None, None
+    return analysis_id, report_name(record), bytes(af.generate_pdf_report(*report_args(record)))
+
+def export_reports(out, workers=MAX_WORKERS, on_progress=None, **filters):
+    """
+    Renders a PDF per analysis matching `filters` (see database.list_full_analysis) and
+    writes each into the zip at `out` (path or binary file object) as soon as it is ready.
+    `on_progress(done, total)` is called from the calling thread after each record.
+    Returns {exported, failed, total, elapsed_s, per_minute}.
+    """
+    total = db.count_full_analysis(**filters)
+    summary = {"exported": 0, "failed": 0, "total": total}
+    errors = []
+    start = time.perf_counter()
+
+    def collect(finished, zf):
+        for future in finished:
+            try:
+                analysis_id, name, data = future.result()
+            except Exception as e:
+                summary["failed"] += 1
+                errors.append(f"{future.analysis_id}: {e}")
+            else:
+                if data is None:
+                    summary["failed"] += 1
+                    errors.append(f"{analysis_id}: record not found")
+                else:
+                    zf.writestr(name, data)
+                    summary["exported"] += 1
+            if on_progress: on_progress(summary["exported"] + summary["failed"], total)
+
+    # spawn: workers must not inherit the parent's open SQLite connections
+    context = multiprocessing.get_context("spawn")
+    limit = max(1, workers) * IN_FLIGHT_PER_WORKER
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as zf, \
+         ProcessPoolExecutor(max_workers=max(1, workers), mp_context=context, initializer=_init_worker, initargs=(db.DB_PATH,)) as pool:
+        in_flight = set()
+        for analysis_id in iter_analysis_ids(**filters):
+            if len(in_flight) >= limit:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(finished, zf)
+            future = pool.submit(_render, analysis_id)
+            future.analysis_id = analysis_id
+            in_flight.add(future)
+        collect(wait(in_flight).done, zf)
+        if errors:
+            zf.writestr("export_errors.txt", "\n".join(errors))
+
+    elapsed = time.perf_counter() - start
+    summary["elapsed_s"] = round(elapsed, 2)
+    summary["per_minute"] = round(summary["exported"] / elapsed * 60, 1) if elapsed > 0 else 0.0
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored analyses as PDF reports in one zip archive.")
+    parser.add_argument("--out", default="reports.zip", help="Zip output path")
+    parser.add_argument("--user", help="Only this username")
+    parser.add_argument("--role", help="Only this job role")
+    parser.add_argument("--from", dest="date_from", type=datetime.date.fromisoformat, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=datetime.date.fromisoformat, help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--min-score", type=int)
+    parser.add_argument("--max-score", type=int)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args(argv)
+
+    db.create_tables()
+    summary = export_reports(args.out, workers=args.workers,
+                             on_progress=lambda done, total: print(f"[{done}/{total}]", file=sys.stderr),
+                             username=args.user, job_role=args.role, date_from=args.date_from, date_to=args.date_to,
+                             min_score=args.min_score, max_score=args.max_score)
+    print(f"{summary['exported']} of {summary['total']} reports written to {args.out} ({summary['failed']} failed) "
+          f"in {summary['elapsed_s']}s ({summary['per_minute']} reports/min).")
+
+if __name__ == "__main__":
+    main()
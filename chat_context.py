@@ -0,0 +1,73 @@
+import math
+
+# --- CHAT CONTEXT SETTINGS ---
+DEFAULT_BUDGET = 3000    # Tokens sent per NexBot request (persona + summary + recent turns)
+SUMMARY_WORDS = 150      # Target length of the rolling summary
+RETAIN_RATIO = 0.5       # After a fold, recent turns fill only this share of the budget,
+                         # so the summary is updated every few turns rather than on every one
+CHARS_PER_TOKEN = 4      # Offline estimate; close enough for English prose with Gemini
+
+def estimate_tokens(text):
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+def content_tokens(contents):
+    return sum(estimate_tokens(part.get("text")) for item in contents for part in item["parts"])
+
+def to_contents(messages):
+    """Streamlit chat messages -> Gemini contents; empty messages are skipped."""
+    return [{"role": "user" if m["role"] == "user" else "model", "parts": [{"text": m["content"]}]}
+            for m in messages if m["content"]]
+
+class ChatContext:
+    """
+    Rolling context for one NexBot conversation; keep one per session.
+    The newest turns are sent verbatim; older ones are folded into a summary that is only
+    extended with the turns that just fell out of the window, never rebuilt from scratch.
+    """
+    def __init__(self, budget=DEFAULT_BUDGET, retain_ratio=RETAIN_RATIO):
+        self.budget = budget
+        self.retain_ratio = retain_ratio
+        self.summary = ""
+        self.folded = 0          # messages[:folded] are represented by the summary
+        self.last_tokens = 0     # Tokens sent with the most recent request
+        self.summaries = 0       # Summary updates so far
+
+    def _summary_contents(self):
+        if not self.summary: return []
+        return [{"role": "user", "parts": [{"text": "Summary of our conversation so far:\n" + self.summary}]},
+                {"role": "model", "parts": [{"text": "Understood, I'll keep that in mind."}]}]
+
+    def build(self, seed, messages, summarize):
+        """
+        Returns the contents for the next request: `seed` (persona turns), the summary, then recent messages.
+        `summarize(summary, messages)` returns the updated summary text, or None on failure.
+        """
+        if self.folded > len(messages):
+            # The chat history was cleared
+            self.summary, self.folded = "", 0
+
+        fixed = content_tokens(seed) + estimate_tokens(self.summary)
+        recent = messages[self.folded:]
+        if len(recent) > 1 and fixed + content_tokens(to_contents(recent)) > self.budget:
+            # Keep the newest messages that fit the retained share; the latest one is always kept
+            target = max(0, self.budget - fixed) * self.retain_ratio
+            keep, used = 0, 0
+            for message in reversed(recent):
+                used += estimate_tokens(message["content"])
+                if keep and used > target: break
+                keep += 1
+            cut = len(messages) - keep
+            # The seed and summary end on a model turn, so the kept turns must open with a user one
+            while cut < len(messages) - 1 and messages[cut]["role"] != "user": cut += 1
+            updated = summarize(self.summary, messages[self.folded:cut])
+            # If summarising fails the old turns are still dropped, so the budget holds
+            if updated: self.summary = updated.strip()
+            self.folded = cut
+            self.summaries += 1
+
+        contents = seed + self._summary_contents() + to_contents(messages[self.folded:])
+        self.last_tokens = content_tokens(contents)
+        return contents
+
+    def stats(self):
+        return {"tokens": self.last_tokens, "budget": self.budget, "summarized_messages": self.folded, "summary_updates": self.summaries}
@@ -1,11 +1,100 @@
 import sqlite3
 import hashlib
+import json
+import zlib
 import datetime
+import os
+import threading
+
+DB_PATH = os.environ.get('NEXHIRE_DB', 'nexhire.db')
+
+# --- CONNECTION POOL ---
+POOL_SIZE = 8             # Idle connections kept open per database file
+STATEMENT_CACHE = 256     # Prepared statements cached per connection
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',        # Readers never block the writer
+    'PRAGMA synchronous=NORMAL',      # Safe with WAL, far fewer fsyncs
+    'PRAGMA cache_size=-16000',       # 16 MB page cache per connection
+    'PRAGMA mmap_size=134217728',     # 128 MB memory-mapped reads
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',
+)
+
+class PooledConnection:
+    """
+    Wraps a pooled sqlite3 connection. close() hands it back to the pool instead of closing it,
+    so the existing get_connection() / close() pattern keeps working unchanged.
+    """
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None: self._pool.release(conn)
+
+    def __del__(self):
+        # A caller that raised before close() still returns its connection
+        try: self.close()
+        except Exception: pass
+
+class ConnectionPool:
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        conn.create_function('inflate', 2, inflate, deterministic=True)
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        return PooledConnection(self, conn or self._connect())
+
+    def release(self, conn):
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction: conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+_pools = {}
+_pools_lock = threading.Lock()
 
 def get_connection():
-    return sqlite3.connect('nexhire.db', check_same_thread=False)
+    with _pools_lock:
+        pool = _pools.get(DB_PATH)
+        if pool is None:
+            pool = _pools[DB_PATH] = ConnectionPool(DB_PATH)
+    return pool.acquire()
+
+def add_column_if_missing(c, table, column, decl):
+    c.execute(f'PRAGMA table_info({table})')
+    if column not in [row[1] for row in c.fetchall()]:
+        c.execute(f'ALTER TABLE {table} ADD COLUMN {column} {decl}')
+
+_tables_ready = set()
 
 def create_tables():
+    # Schema setup runs once per process and database file, not on every Streamlit rerun
+    if DB_PATH in _tables_ready: return
     conn = get_connection()
     c = conn.cursor()
     c.execute('CREATE TABLE IF NOT EXISTS users(username TEXT PRIMARY KEY, password TEXT, is_admin INTEGER DEFAULT 0)')
@@ -28,8 +117,268 @@ def create_tables():
                 )''')
     
     c.execute('CREATE TABLE IF NOT EXISTS user_preferences(username TEXT PRIMARY KEY, theme TEXT DEFAULT "light")')
+
+    # --- BULK RANKING CHECKPOINTS ---
+    c.execute('''CREATE TABLE IF NOT EXISTS batch_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT,
+                    job_role TEXT,
+                    job_desc TEXT,
+                    jd_hash TEXT,
+                    source TEXT,
+                    status TEXT,
+                    created TEXT,
+                    finished TEXT
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS batch_results (
+                    run_id INTEGER,
+                    file_name TEXT,
+                    file_hash TEXT,
+                    score INTEGER,
+                    missing_keywords TEXT,
+                    summary TEXT,
+                    status TEXT,
+                    date TEXT,
+                    PRIMARY KEY (run_id, file_hash)
+                )''')
+    add_column_if_missing(c, 'batch_results', 'prerank_score', 'REAL')
+
+    # Migrations first: the search backfill reads texts from the blob store
+    vacuum = run_migrations(c)
+    create_search_index(c)
     conn.commit()
+    if vacuum:
+        # Hand the pages freed by a migration back to the filesystem (can't run inside a transaction)
+        conn.execute('VACUUM')
     conn.close()
+    _tables_ready.add(DB_PATH)
+
+# --- SCHEMA MIGRATIONS ---
+# Applied in order; PRAGMA user_version records how many have run on this file.
+
+def _migrate_history_indexes(c):
+    # Covering index: per-user history and role/time aggregates never touch the table rows
+    c.execute('CREATE INDEX IF NOT EXISTS idx_history_user_date ON history(username, date, score, job_role)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_full_analysis_date ON full_analysis(date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_full_analysis_user_date ON full_analysis(username, date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_full_analysis_role_date ON full_analysis(job_role, date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_full_analysis_score ON full_analysis(score)')
+
+def _migrate_user_stats(c):
+    # Per-user rollup kept current by a trigger, so lifetime totals are a single primary-key lookup
+    c.execute('''CREATE TABLE IF NOT EXISTS user_stats (
+                    username TEXT PRIMARY KEY,
+                    total_scans INTEGER DEFAULT 0,
+                    score_sum INTEGER DEFAULT 0,
+                    best_score INTEGER DEFAULT 0,
+                    last_scan TEXT
+                )''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_history_user_stats AFTER INSERT ON history
+                 BEGIN
+                     INSERT INTO user_stats(username, total_scans, score_sum, best_score, last_scan)
+                     VALUES (NEW.username, 1, COALESCE(NEW.score, 0), COALESCE(NEW.score, 0), NEW.date)
+                     ON CONFLICT(username) DO UPDATE SET
+                         total_scans = total_scans + 1,
+                         score_sum = score_sum + COALESCE(NEW.score, 0),
+                         best_score = MAX(best_score, COALESCE(NEW.score, 0)),
+                         last_scan = MAX(COALESCE(last_scan, ''), NEW.date);
+                 END''')
+    c.execute('DELETE FROM user_stats')
+    c.execute('''INSERT INTO user_stats(username, total_scans, score_sum, best_score, last_scan)
+                 SELECT username, COUNT(*), COALESCE(SUM(score), 0), COALESCE(MAX(score), 0), MAX(date)
+                 FROM history GROUP BY username''')
+
+def _migrate_blob_store(c):
+    # Moves every stored text into the blob store and leaves its blob id in the row
+    create_blob_table(c)
+    last_id = 0
+    while True:
+        c.execute(f'SELECT id, {", ".join(BLOB_COLUMNS)} FROM full_analysis WHERE id > ? ORDER BY id LIMIT 500', (last_id,))
+        rows = c.fetchall()
+        if not rows: break
+        for row in rows:
+            refs = [put_blob(c, text) for text in row[1:]]
+            c.execute(f'UPDATE full_analysis SET {", ".join(col + " = ?" for col in BLOB_COLUMNS)} WHERE id = ?', refs + [row[0]])
+        last_id = rows[-1][0]
+    return True
+
+def _migrate_llm_calls(c):
+    # One row per logical LLM call (after key rotation), written through the write-behind queue
+    c.execute('''CREATE TABLE IF NOT EXISTS llm_calls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT,
+                    prompt_name TEXT,
+                    status TEXT,
+                    duration_ms REAL,
+                    ttft_ms REAL,
+                    input_tokens INTEGER,
+                    output_tokens INTEGER,
+                    key_id TEXT,
+                    retries INTEGER,
+                    error TEXT
+                )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_llm_calls_date ON llm_calls(date, prompt_name)')
+
+def _migrate_scan_jobs(c):
+    # Background full scans: one row per job plus one per finished stage, so a page refresh can reattach
+    c.execute('''CREATE TABLE IF NOT EXISTS scan_jobs (
+                    id TEXT PRIMARY KEY,
+                    username TEXT,
+                    job_role TEXT,
+                    category TEXT,
+                    resume_text INTEGER,
+                    job_desc INTEGER,
+                    input_hash TEXT,
+                    status TEXT,
+                    error TEXT,
+                    created TEXT,
+                    finished TEXT,
+                    heartbeat REAL
+                )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_scan_jobs_user ON scan_jobs(username, status, created)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_scan_jobs_status ON scan_jobs(status, heartbeat)')
+    c.execute('''CREATE TABLE IF NOT EXISTS scan_job_stages (
+                    job_id TEXT,
+                    stage TEXT,
+                    result TEXT,
+                    date TEXT,
+                    PRIMARY KEY (job_id, stage)
+                )''')
+
+def _migrate_llm_call_stats(c):
+    # Hourly per-prompt rollup kept current by a trigger, so the latency report never scans llm_calls;
+    # latency samples are read per prompt, newest first
+    c.execute('CREATE INDEX IF NOT EXISTS idx_llm_calls_prompt ON llm_calls(prompt_name, date)')
+    c.execute('''CREATE TABLE IF NOT EXISTS llm_call_stats (
+                    hour TEXT,
+                    prompt_name TEXT,
+                    calls INTEGER DEFAULT 0,
+                    ttft_sum REAL DEFAULT 0,
+                    ttft_calls INTEGER DEFAULT 0,
+                    input_tokens INTEGER DEFAULT 0,
+                    output_tokens INTEGER DEFAULT 0,
+                    retries INTEGER DEFAULT 0,
+                    hedged INTEGER DEFAULT 0,
+                    timeouts INTEGER DEFAULT 0,
+                    errors INTEGER DEFAULT 0,
+                    PRIMARY KEY (hour, prompt_name)
+                )''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_llm_calls_stats AFTER INSERT ON llm_calls
+                 BEGIN
+                     INSERT INTO llm_call_stats(hour, prompt_name, calls, ttft_sum, ttft_calls, input_tokens, output_tokens,
+                                                retries, hedged, timeouts, errors)
+                     VALUES (substr(NEW.date, 1, 13), NEW.prompt_name, 1, COALESCE(NEW.ttft_ms, 0), NEW.ttft_ms IS NOT NULL,
+                             COALESCE(NEW.input_tokens, 0), COALESCE(NEW.output_tokens, 0), COALESCE(NEW.retries, 0),
+                             NEW.status = 'hedged', NEW.status = 'timeout', NEW.status IN ('error', 'exhausted'))
+                     ON CONFLICT(hour, prompt_name) DO UPDATE SET
+                         calls = calls + 1,
+                         ttft_sum = ttft_sum + excluded.ttft_sum,
+                         ttft_calls = ttft_calls + excluded.ttft_calls,
+                         input_tokens = input_tokens + excluded.input_tokens,
+                         output_tokens = output_tokens + excluded.output_tokens,
+                         retries = retries + excluded.retries,
+                         hedged = hedged + excluded.hedged,
+                         timeouts = timeouts + excluded.timeouts,
+                         errors = errors + excluded.errors;
+                 END''')
+    c.execute('DELETE FROM llm_call_stats')
+    c.execute('''INSERT INTO llm_call_stats(hour, prompt_name, calls, ttft_sum, ttft_calls, input_tokens, output_tokens,
+                                           retries, hedged, timeouts, errors)
+                 SELECT substr(date, 1, 13), prompt_name, COUNT(*), TOTAL(ttft_ms), COUNT(ttft_ms), TOTAL(input_tokens),
+                        TOTAL(output_tokens), TOTAL(retries), SUM(status = 'hedged'), SUM(status = 'timeout'),
+                        SUM(status IN ('error', 'exhausted'))
+                 FROM llm_calls GROUP BY substr(date, 1, 13), prompt_name''')
+
+MIGRATIONS = [_migrate_history_indexes, _migrate_user_stats, _migrate_blob_store, _migrate_llm_calls, _migrate_scan_jobs,
+              _migrate_llm_call_stats]
+
+def run_migrations(c):
+    """Applies pending migrations; True if any of them asked for a VACUUM afterwards."""
+    c.execute('PRAGMA user_version')
+    version = c.fetchone()[0]
+    vacuum = False
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        vacuum = bool(migration(c)) or vacuum
+        c.execute(f'PRAGMA user_version = {number}')
+    return vacuum
+
+# --- BLOB STORE ---
+# full_analysis keeps a blob id per text column; each distinct text (by sha256) is stored once, compressed.
+# The same JD across a batch of candidates, or the same resume across re-scans, costs one row.
+BLOB_COLUMNS = ('resume_text', 'job_desc', 'feedback', 'cover_letter', 'interview_questions', 'market_analysis', 'roadmap')
+BLOB_MIN_COMPRESS = 128   # Shorter texts are stored raw; zlib would not save anything
+BLOB_LEVEL = 6
+
+def create_blob_table(c):
+    # Integer ids keep the references in full_analysis rows to a few bytes each
+    c.execute('CREATE TABLE IF NOT EXISTS blobs(id INTEGER PRIMARY KEY, hash BLOB UNIQUE, codec TEXT, data BLOB, size INTEGER)')
+
+def inflate(codec, data):
+    """Decodes one blob row; also registered as the SQL function inflate(codec, data)."""
+    if data is None: return None
+    if codec == 'zlib': data = zlib.decompress(data)
+    return bytes(data).decode('utf-8')
+
+def put_blob(c, text):
+    """Stores `text` (once) and returns its blob id; None stays None."""
+    if text is None: return None
+    raw = str(text).encode('utf-8')
+    digest = hashlib.sha256(raw).digest()
+    c.execute('SELECT id FROM blobs WHERE hash = ?', (digest,))
+    row = c.fetchone()
+    if row: return row[0]
+    codec, data = ('zlib', zlib.compress(raw, BLOB_LEVEL)) if len(raw) >= BLOB_MIN_COMPRESS else ('raw', raw)
+    # Another connection (e.g. the write-behind thread) may store the same text in between
+    c.execute('INSERT OR IGNORE INTO blobs(hash, codec, data, size) VALUES (?,?,?,?)', (digest, codec, data, len(raw)))
+    if c.rowcount: return c.lastrowid
+    c.execute('SELECT id FROM blobs WHERE hash = ?', (digest,))
+    return c.fetchone()[0]
+
+def load_blobs(c, refs):
+    """Resolves blob ids to texts in one query: {id: text}."""
+    # The text columns keep TEXT affinity, so ids come back as strings
+    refs = list({int(ref) for ref in refs if ref is not None})
+    if not refs: return {}
+    c.execute(f'SELECT id, codec, data FROM blobs WHERE id IN ({",".join("?" * len(refs))})', refs)
+    return {ref: inflate(codec, data) for ref, codec, data in c.fetchall()}
+
+def _resolve_row(c, row):
+    # Swaps the blob ids in an ANALYSIS_COLUMNS row for their texts
+    texts = load_blobs(c, [row[ANALYSIS_COLUMNS.index(col)] for col in BLOB_COLUMNS])
+    return tuple((texts.get(int(value)) if value is not None else None) if col in BLOB_COLUMNS else value for col, value in zip(ANALYSIS_COLUMNS, row))
+
+# --- FULL-TEXT SEARCH ---
+FTS_ENABLED = True
+
+def create_search_index(c):
+    """
+    Contentless FTS5 index over resume, JD and feedback, keyed by full_analysis.id.
+    Rows saved before the index existed are backfilled once.
+    """
+    global FTS_ENABLED
+    try:
+        c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS full_analysis_fts
+                     USING fts5(resume_text, job_desc, feedback, content='', tokenize='porter unicode61')''')
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: search falls back to LIKE
+        FTS_ENABLED = False
+        return
+    c.execute('SELECT MAX(rowid) FROM full_analysis_fts')
+    indexed = c.fetchone()[0] or 0
+    # Decoded in Python rather than with the SQL inflate(), so this also works on connections
+    # that did not come from the pool
+    rows = c.connection.execute('''SELECT fa.id, r.codec, r.data, j.codec, j.data, f.codec, f.data
+                                  FROM full_analysis fa
+                                  LEFT JOIN blobs r ON r.id = fa.resume_text
+                                  LEFT JOIN blobs j ON j.id = fa.job_desc
+                                  LEFT JOIN blobs f ON f.id = fa.feedback
+                                  WHERE fa.id > ?''', (indexed,))
+    c.executemany('INSERT INTO full_analysis_fts(rowid, resume_text, job_desc, feedback) VALUES (?,?,?,?)',
+                  ((row[0], inflate(*row[1:3]), inflate(*row[3:5]), inflate(*row[5:7])) for row in rows))
+
+def fts_query(text):
+    """Quotes each term so user input like 'c++' or 'node.js' can't break FTS syntax; terms are ANDed."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
 
 # --- USER AUTH ---
 def login_user(username, password):
@@ -69,12 +418,33 @@ def is_admin(username):
     return result[0] if result else 0
 
 # --- DATA SAVING ---
+def timestamp():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+# insert_* take an open cursor and leave the commit to the caller (save_* below, or the write-behind queue)
+def insert_scan(c, username, job_role, score, date):
+    c.execute('INSERT INTO history(username, job_role, score, date) VALUES (?,?,?,?)', (username, job_role, score, date))
+
+def insert_full_analysis(c, username, job_role, resume_text, job_desc, score, feedback, cover_letter, interview_questions, market_analysis, roadmap, date):
+    refs = [put_blob(c, text) for text in (resume_text, job_desc, feedback, cover_letter, interview_questions, market_analysis, roadmap)]
+    c.execute('''INSERT INTO full_analysis 
+                 (username, job_role, resume_text, job_desc, feedback, cover_letter, interview_questions, market_analysis, roadmap, score, date) 
+                 VALUES (?,?,?,?,?,?,?,?,?,?,?)''', 
+                 [username, job_role] + refs + [score, date])
+    if FTS_ENABLED:
+        # Same transaction, so the search index never drifts from the table
+        c.execute('INSERT INTO full_analysis_fts(rowid, resume_text, job_desc, feedback) VALUES (?,?,?,?)',
+                  (c.lastrowid, resume_text, job_desc, feedback))
+
+def insert_llm_call(c, date, prompt_name, status, duration_ms, ttft_ms, input_tokens, output_tokens, key_id, retries, error):
+    c.execute('''INSERT INTO llm_calls(date, prompt_name, status, duration_ms, ttft_ms, input_tokens, output_tokens, key_id, retries, error)
+                 VALUES (?,?,?,?,?,?,?,?,?,?)''', (date, prompt_name, status, duration_ms, ttft_ms, input_tokens, output_tokens, key_id, retries, error))
+
 def save_scan(username, job_role, score):
     """Saves basic stats for the User Dashboard graphs"""
     conn = get_connection()
     c = conn.cursor()
-    date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute('INSERT INTO history(username, job_role, score, date) VALUES (?,?,?,?)', (username, job_role, score, date))
+    insert_scan(c, username, job_role, score, timestamp())
     conn.commit()
     conn.close()
 
@@ -82,11 +452,7 @@ def save_full_analysis(username, job_role, resume_text, job_desc, score, feedbac
     """Saves EVERYTHING for the Admin Console"""
     conn = get_connection()
     c = conn.cursor()
-    date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute('''INSERT INTO full_analysis 
-                 (username, job_role, resume_text, job_desc, score, feedback, cover_letter, interview_questions, market_analysis, roadmap, date) 
-                 VALUES (?,?,?,?,?,?,?,?,?,?,?)''', 
-                 (username, job_role, resume_text, job_desc, score, feedback, cover_letter, interview_questions, market_analysis, roadmap, date))
+    insert_full_analysis(c, username, job_role, resume_text, job_desc, score, feedback, cover_letter, interview_questions, market_analysis, roadmap, timestamp())
     conn.commit()
     conn.close()
 
@@ -99,11 +465,300 @@ def fetch_history(username):
     conn.close()
     return data
 
+# --- DASHBOARD AGGREGATES ---
+def get_scan_stats(username):
+    """Lifetime totals from the user_stats rollup: {"total", "average", "best", "last_scan"}."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT total_scans, score_sum, best_score, last_scan FROM user_stats WHERE username=?', (username,))
+    row = c.fetchone()
+    conn.close()
+    if not row: return {"total": 0, "average": 0, "best": 0, "last_scan": None}
+    total, score_sum, best, last_scan = row
+    return {"total": total, "average": round(score_sum / total, 1) if total else 0, "best": best, "last_scan": last_scan}
+
+def get_scans_per_role(username, days=30):
+    """(day, job_role, scans, avg_score) for the last `days` days, served from idx_history_user_date."""
+    conn = get_connection()
+    c = conn.cursor()
+    since = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+    c.execute('''SELECT substr(date, 1, 10) AS day, COALESCE(NULLIF(job_role, ''), 'Unspecified') AS role, COUNT(*), ROUND(AVG(score), 1)
+                 FROM history WHERE username=? AND date >= ?
+                 GROUP BY day, role ORDER BY day''', (username, since))
+    data = c.fetchall()
+    conn.close()
+    return data
+
 def get_all_full_analysis():
     """Fetches full details for Admin"""
     conn = get_connection()
     c = conn.cursor()
-    c.execute('SELECT * FROM full_analysis ORDER BY date DESC')
+    c.execute(f'SELECT {", ".join(ANALYSIS_COLUMNS)} FROM full_analysis ORDER BY date DESC')
+    data = [_resolve_row(c, row) for row in c.fetchall()]
+    conn.close()
+    return data
+
+ANALYSIS_SUMMARY = 'fa.id, fa.date, fa.username, fa.job_role, fa.score'
+ANALYSIS_COLUMNS = ['id', 'username', 'job_role', 'resume_text', 'job_desc', 'score', 'feedback',
+                    'cover_letter', 'interview_questions', 'market_analysis', 'roadmap', 'date']
+
+def _analysis_filters(username=None, job_role=None, date_from=None, date_to=None, min_score=None, max_score=None):
+    """WHERE fragment and args for the admin filters; each one is skipped when None."""
+    clauses, args = [], []
+    if username: clauses.append('fa.username = ?'); args.append(username)
+    if job_role: clauses.append('fa.job_role = ?'); args.append(job_role)
+    # Dates are stored as "YYYY-MM-DD HH:MM:SS", so plain string comparison orders them
+    if date_from: clauses.append('fa.date >= ?'); args.append(str(date_from))
+    if date_to: clauses.append('fa.date < ?'); args.append(str(date_to + datetime.timedelta(days=1)) if isinstance(date_to, datetime.date) else str(date_to))
+    if min_score is not None: clauses.append('fa.score >= ?'); args.append(min_score)
+    if max_score is not None: clauses.append('fa.score <= ?'); args.append(max_score)
+    return ''.join(' AND ' + clause for clause in clauses), tuple(args)
+
+def list_full_analysis(limit=25, after=None, **filters):
+    """
+    One page of (id, date, username, job_role, score) rows, newest first.
+    `after` is the (date, id) of the last row on the previous page; seeking past it keeps
+    every page an index range scan no matter how deep the admin pages.
+    Filters: username, job_role, date_from, date_to, min_score, max_score.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    where, args = _analysis_filters(**filters)
+    if after is not None:
+        where += ' AND (fa.date < ? OR (fa.date = ? AND fa.id < ?))'
+        args += (after[0], after[0], after[1])
+    c.execute(f'SELECT {ANALYSIS_SUMMARY} FROM full_analysis fa WHERE 1=1{where} ORDER BY fa.date DESC, fa.id DESC LIMIT ?', args + (limit,))
     data = c.fetchall()
     conn.close()
     return data
+
+def count_full_analysis(**filters):
+    """Number of analyses matching the list_full_analysis filters."""
+    conn = get_connection()
+    c = conn.cursor()
+    where, args = _analysis_filters(**filters)
+    c.execute(f'SELECT COUNT(*) FROM full_analysis fa WHERE 1=1{where}', args)
+    total = c.fetchone()[0]
+    conn.close()
+    return total
+
+def get_full_analysis(analysis_id):
+    """Full record for one analysis as a dict, or None."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(f'SELECT {", ".join(ANALYSIS_COLUMNS)} FROM full_analysis WHERE id = ?', (analysis_id,))
+    row = c.fetchone()
+    if row: row = _resolve_row(c, row)
+    conn.close()
+    return dict(zip(ANALYSIS_COLUMNS, row)) if row else None
+
+def search_full_analysis(query, limit=50, **filters):
+    """
+    Ranked search over stored analyses (best match first).
+    Returns (id, date, username, job_role, score) rows; accepts the same filters as list_full_analysis.
+    """
+    if not query or not query.strip():
+        return list_full_analysis(limit=limit, **filters)
+    conn = get_connection()
+    c = conn.cursor()
+    where, args = _analysis_filters(**filters)
+    if FTS_ENABLED:
+        # bm25 column weights: resume 1.0, JD 0.5, feedback 0.8
+        c.execute(f'''SELECT {ANALYSIS_SUMMARY}
+                     FROM full_analysis_fts JOIN full_analysis fa ON fa.id = full_analysis_fts.rowid
+                     WHERE full_analysis_fts MATCH ?{where}
+                     ORDER BY bm25(full_analysis_fts, 1.0, 0.5, 0.8) LIMIT ?''', (fts_query(query),) + args + (limit,))
+    else:
+        like = f"%{query.strip()}%"
+        c.execute(f'''SELECT {ANALYSIS_SUMMARY} FROM full_analysis fa
+                     LEFT JOIN blobs r ON r.id = fa.resume_text
+                     LEFT JOIN blobs j ON j.id = fa.job_desc
+                     LEFT JOIN blobs f ON f.id = fa.feedback
+                     WHERE (inflate(r.codec, r.data) LIKE ? OR inflate(j.codec, j.data) LIKE ? OR inflate(f.codec, f.data) LIKE ?){where}
+                     ORDER BY fa.date DESC LIMIT ?''', (like, like, like) + args + (limit,))
+    data = c.fetchall()
+    conn.close()
+    return data
+
+def summarize_llm_calls(since):
+    """
+    One row per prompt from the hourly llm_call_stats rollup, for hours from `since` on:
+    (prompt_name, calls, avg_ttft_ms, input_tokens, output_tokens, retries, hedged, timeouts, errors).
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''SELECT prompt_name, SUM(calls), TOTAL(ttft_sum) / NULLIF(SUM(ttft_calls), 0), TOTAL(input_tokens),
+                        TOTAL(output_tokens), TOTAL(retries), SUM(hedged), SUM(timeouts), SUM(errors)
+                 FROM llm_call_stats WHERE hour >= substr(?, 1, 13) GROUP BY prompt_name''', (since,))
+    data = c.fetchall()
+    conn.close()
+    return data
+
+def fetch_llm_durations(prompt_name, since, statuses, limit):
+    """duration_ms of the newest `limit` calls of `prompt_name` with one of `statuses`, on or after `since`."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(f'''SELECT duration_ms FROM llm_calls
+                  WHERE prompt_name = ? AND date >= ? AND status IN ({",".join("?" * len(statuses))})
+                  ORDER BY date DESC LIMIT ?''', (prompt_name, since) + tuple(statuses) + (limit,))
+    data = [row[0] for row in c.fetchall()]
+    conn.close()
+    return data
+
+def delete_llm_calls_before(c, date):
+    """Retention for llm_calls and its rollup; runs on the write-behind thread."""
+    c.execute('DELETE FROM llm_calls WHERE date < ?', (date,))
+    c.execute('DELETE FROM llm_call_stats WHERE hour < substr(?, 1, 13)', (date,))
+
+# --- BULK RANKING ---
+def create_batch_run(username, job_role, job_desc, jd_hash, source):
+    conn = get_connection()
+    c = conn.cursor()
+    date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    c.execute('INSERT INTO batch_runs(username, job_role, job_desc, jd_hash, source, status, created) VALUES (?,?,?,?,?,?,?)',
+              (username, job_role, job_desc, jd_hash, source, 'running', date))
+    run_id = c.lastrowid
+    conn.commit()
+    conn.close()
+    return run_id
+
+def find_open_batch_run(jd_hash, source):
+    """Latest unfinished run for the same JD and source, so an interrupted run can resume."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT id FROM batch_runs WHERE jd_hash=? AND source=? AND status != 'complete' ORDER BY id DESC LIMIT 1", (jd_hash, source))
+    result = c.fetchone()
+    conn.close()
+    return result[0] if result else None
+
+def finish_batch_run(run_id, status='complete'):
+    conn = get_connection()
+    c = conn.cursor()
+    date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    c.execute("UPDATE batch_runs SET status=?, finished=? WHERE id=?", (status, date, run_id))
+    conn.commit()
+    conn.close()
+
+def save_batch_result(run_id, file_name, file_hash, score, missing_keywords, summary, status, prerank_score=None):
+    """Checkpoints one resume of a bulk run; missing_keywords is stored as JSON text."""
+    conn = get_connection()
+    c = conn.cursor()
+    date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    c.execute('''INSERT OR REPLACE INTO batch_results(run_id, file_name, file_hash, score, prerank_score, missing_keywords, summary, status, date)
+                 VALUES (?,?,?,?,?,?,?,?,?)''', (run_id, file_name, file_hash, score, prerank_score, missing_keywords, summary, status, date))
+    conn.commit()
+    conn.close()
+
+def get_batch_done_hashes(run_id):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT file_hash FROM batch_results WHERE run_id=? AND status='scored'", (run_id,))
+    data = {row[0] for row in c.fetchall()}
+    conn.close()
+    return data
+
+def fetch_batch_results(run_id):
+    """Ranked results for a run, best score first."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''SELECT file_name, score, prerank_score, missing_keywords, summary, status, date FROM batch_results
+                 WHERE run_id=? ORDER BY status='scored' DESC, score DESC, prerank_score DESC, file_name''', (run_id,))
+    data = c.fetchall()
+    conn.close()
+    return data
+
+# --- BACKGROUND SCAN JOBS ---
+# resume_text / job_desc hold blob ids; stage results are stored as JSON
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+def create_scan_job(job_id, username, job_role, category, resume_text, job_desc, input_hash, heartbeat):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''INSERT INTO scan_jobs(id, username, job_role, category, resume_text, job_desc, input_hash, status, created, heartbeat)
+                 VALUES (?,?,?,?,?,?,?,?,?,?)''',
+              (job_id, username, job_role, category, put_blob(c, resume_text), put_blob(c, job_desc), input_hash, 'queued', timestamp(), heartbeat))
+    conn.commit()
+    conn.close()
+
+def find_active_scan_job(username, input_hash=None):
+    """Newest queued or running job of `username` (optionally for the same inputs), or None."""
+    conn = get_connection()
+    c = conn.cursor()
+    query = 'SELECT id FROM scan_jobs WHERE username=? AND status IN (?,?)'
+    args = (username,) + ACTIVE_JOB_STATUSES
+    if input_hash: query, args = query + ' AND input_hash=?', args + (input_hash,)
+    c.execute(query + ' ORDER BY created DESC LIMIT 1', args)
+    result = c.fetchone()
+    conn.close()
+    return result[0] if result else None
+
+def get_scan_job(job_id):
+    """Job row as a dict with resume / JD texts resolved and 'stages' = {stage: result}, or None."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''SELECT id, username, job_role, category, resume_text, job_desc, status, error, created, finished, heartbeat
+                 FROM scan_jobs WHERE id=?''', (job_id,))
+    row = c.fetchone()
+    if not row:
+        conn.close()
+        return None
+    job = dict(zip(('id', 'username', 'job_role', 'category', 'resume_text', 'job_desc', 'status', 'error', 'created', 'finished', 'heartbeat'), row))
+    texts = load_blobs(c, [job['resume_text'], job['job_desc']])
+    job['resume_text'], job['job_desc'] = texts.get(job['resume_text']), texts.get(job['job_desc'])
+    c.execute('SELECT stage, result FROM scan_job_stages WHERE job_id=?', (job_id,))
+    job['stages'] = {stage: json.loads(result) for stage, result in c.fetchall()}
+    conn.close()
+    return job
+
+def save_scan_stage(job_id, stage, result):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('INSERT OR REPLACE INTO scan_job_stages(job_id, stage, result, date) VALUES (?,?,?,?)',
+              (job_id, stage, json.dumps(result), timestamp()))
+    conn.commit()
+    conn.close()
+
+def set_scan_job_status(job_id, status, error=None):
+    """
+    Moves a queued/running job to `status`; leaving queued/running also stamps `finished`.
+    A job that already finished (e.g. cancelled from another process) is left alone; returns
+    whether the job was moved.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    finished = None if status in ACTIVE_JOB_STATUSES else timestamp()
+    c.execute('UPDATE scan_jobs SET status=?, error=?, finished=? WHERE id=? AND status IN (?,?)',
+              (status, error, finished, job_id) + ACTIVE_JOB_STATUSES)
+    moved = c.rowcount > 0
+    conn.commit()
+    conn.close()
+    return moved
+
+def touch_scan_jobs(job_ids, heartbeat):
+    """Marks jobs as still owned by a live worker; returns those no longer queued/running (cancelled elsewhere)."""
+    if not job_ids: return []
+    conn = get_connection()
+    c = conn.cursor()
+    c.executemany('UPDATE scan_jobs SET heartbeat=? WHERE id=?', [(heartbeat, job_id) for job_id in job_ids])
+    marks = ','.join('?' * len(job_ids))
+    c.execute(f'SELECT id FROM scan_jobs WHERE id IN ({marks}) AND status NOT IN (?,?)', tuple(job_ids) + ACTIVE_JOB_STATUSES)
+    stopped = [row[0] for row in c.fetchall()]
+    conn.commit()
+    conn.close()
+    return stopped
+
+def claim_stale_scan_jobs(stale_before, heartbeat):
+    """
+    Takes over queued/running jobs whose worker stopped sending heartbeats (e.g. the server restarted).
+    Each job is claimed by exactly one caller, even across processes; returns the claimed ids.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT id, heartbeat FROM scan_jobs WHERE status IN (?,?) AND heartbeat < ?', ACTIVE_JOB_STATUSES + (stale_before,))
+    claimed = []
+    for job_id, old in c.fetchall():
+        c.execute('UPDATE scan_jobs SET heartbeat=? WHERE id=? AND heartbeat=?', (heartbeat, job_id, old))
+        if c.rowcount: claimed.append(job_id)
+    conn.commit()
+    conn.close()
+    return claimed
@@ -0,0 +1,138 @@
+import hashlib
+import random
+import threading
+import time
+
+# --- POOL SETTINGS ---
+DEFAULT_RPM = 60          # Token-bucket refill rate per key (requests per minute)
+PER_KEY_CONCURRENCY = 2   # Max simultaneous requests in flight per key
+BASE_COOLDOWN = 5.0       # Seconds a key rests after its first 429
+MAX_COOLDOWN = 300.0      # Upper bound for the exponential backoff
+ACQUIRE_TIMEOUT = 20.0    # How long a caller waits for any healthy key
+
+def key_id(api_key):
+    """Short, non-reversible id so keys can be logged and displayed safely."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:8]
+
+class KeyState:
+    def __init__(self, api_key, rate_per_minute):
+        self.api_key = api_key
+        self.id = key_id(api_key)
+        self.capacity = max(1.0, rate_per_minute / 4)  # Allow short bursts
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.failures = 0        # Consecutive failed calls; reset only by a successful one
+        self.errors = 0
+        self.served = 0
+        self.rate_limited = 0
+        self.models = {}
+
+class KeyPool:
+    """
+    Process-wide scheduler for Gemini API keys.
+    Each key has a token bucket and an in-flight cap; keys that return 429 / "exhausted"
+    rest with exponential backoff. acquire() hands out the least-loaded healthy key, preferring
+    keys whose last calls succeeded.
+    """
+    def __init__(self, keys, model_factory, rate_per_minute=DEFAULT_RPM, max_in_flight=PER_KEY_CONCURRENCY,
+                 base_cooldown=BASE_COOLDOWN, max_cooldown=MAX_COOLDOWN):
+        self.keys = list(keys)
+        self.model_factory = model_factory
+        self.rate_per_second = rate_per_minute / 60.0
+        self.max_in_flight = max_in_flight
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._states = [KeyState(k, rate_per_minute) for k in self.keys]
+        self._cond = threading.Condition()
+
+    def _refill(self, state, now):
+        state.tokens = min(state.capacity, state.tokens + (now - state.last_refill) * self.rate_per_second)
+        state.last_refill = now
+
+    def _ready_in(self, state, now):
+        """Seconds until this key could serve a request (0 if it can serve now)."""
+        wait = max(0.0, state.cooldown_until - now)
+        if state.tokens < 1:
+            wait = max(wait, (1 - state.tokens) / self.rate_per_second)
+        return wait
+
+    def acquire(self, exclude=(), timeout=ACQUIRE_TIMEOUT):
+        """
+        Reserves a key, blocking until one is healthy or `timeout` passes.
+        Returns a KeyState, or None when no usable key remains (all excluded or resting too long).
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                candidates = [s for s in self._states if s.id not in exclude]
+                if not candidates: return None
+
+                for s in candidates: self._refill(s, now)
+                ready = [s for s in candidates if s.in_flight < self.max_in_flight and self._ready_in(s, now) == 0]
+                if ready:
+                    # Least loaded first, then the fewest recent failures, then the fullest bucket
+                    state = min(ready, key=lambda s: (s.in_flight, s.failures, -s.tokens))
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return state
+
+                idle = [s for s in candidates if s.in_flight < self.max_in_flight]
+                busy = len(idle) < len(candidates)
+                remaining = deadline - now
+                next_ready = min(self._ready_in(s, now) for s in idle) if idle else remaining
+                if remaining <= 0 or (next_ready > remaining and not busy):
+                    return None
+                # Woken early by release() when a busy key frees a slot
+                self._cond.wait(min(next_ready, remaining))
+
+    def release(self, state, outcome="ok"):
+        """
+        Frees a slot on `state`. `outcome` is "ok", "rate_limited" (429: the key rests),
+        "error" (5xx, auth, timeout) or "cancelled" (never sent). Only "ok" clears the
+        key's failure streak.
+        """
+        with self._cond:
+            state.in_flight -= 1
+            if outcome == "rate_limited":
+                state.failures += 1
+                state.rate_limited += 1
+                backoff = min(self.max_cooldown, self.base_cooldown * 2 ** (state.failures - 1))
+                state.cooldown_until = time.monotonic() + backoff * random.uniform(0.8, 1.2)
+                state.tokens = 0
+            elif outcome == "error":
+                state.failures += 1
+                state.errors += 1
+            elif outcome == "ok":
+                state.failures = 0
+                state.served += 1
+            self._cond.notify_all()
+
+    def get_model(self, state, model_name):
+        """One client per key, built once and reused."""
+        with self._cond:
+            model = state.models.get(model_name)
+            if model is None:
+                model = self.model_factory(state.api_key, model_name)
+                state.models[model_name] = model
+            return model
+
+    def snapshot(self):
+        """Health summary for the admin console."""
+        now = time.monotonic()
+        with self._cond:
+            rows = []
+            for s in self._states:
+                self._refill(s, now)
+                rows.append({
+                    "key_id": s.id,
+                    "in_flight": s.in_flight,
+                    "tokens": round(s.tokens, 2),
+                    "cooldown_s": round(max(0.0, s.cooldown_until - now), 1),
+                    "served": s.served,
+                    "rate_limited": s.rate_limited,
+                    "errors": s.errors,
+                })
+            return rows
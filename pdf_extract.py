@@ -0,0 +1,90 @@
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import PyPDF2
+
+# --- EXTRACTION LIMITS ---
+MAX_BYTES = 20 * 1024 * 1024   # Reject uploads above 20 MB
+MAX_PAGES = 300                # Pages past this are ignored
+INLINE_PAGE_LIMIT = 16         # Short resumes are faster without a process pool
+PAGES_PER_CHUNK = 8
+PAGE_BREAK = "\n\f\n"         # Between pages in extract_text, so headers/footers can be told apart
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+class PdfLimitError(ValueError):
+    """Raised when an upload exceeds MAX_BYTES."""
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Process pool shared by every session; created on the first large PDF.
+    Spawned, not forked: a fork of the threaded Streamlit server could inherit held locks
+    and open SQLite connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _extract_range(path, start, stop):
+    # Runs in a worker process: each worker parses the file once per chunk
+    with open(path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def count_pages(file_bytes):
+    """Pages in the document, including any past MAX_PAGES that extraction skips."""
+    return len(PyPDF2.PdfReader(io.BytesIO(file_bytes)).pages)
+
+def iter_pages(file_bytes, max_pages=MAX_PAGES, max_bytes=MAX_BYTES):
+    """
+    Yields (page_number, page_count, text) in page order.
+    Large documents are split into chunks extracted in parallel; pages are yielded
+    as soon as their chunk (and every chunk before it) has finished.
+    """
+    if len(file_bytes) > max_bytes:
+        raise PdfLimitError(f"PDF is {len(file_bytes) // 1024} KB; the limit is {max_bytes // 1024} KB.")
+
+    reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+    total = min(len(reader.pages), max_pages)
+
+    if total <= INLINE_PAGE_LIMIT or MAX_WORKERS < 2:
+        for i in range(total):
+            yield i + 1, total, reader.pages[i].extract_text() or ""
+        return
+
+    # Workers read from a temp file so the bytes are not pickled once per chunk
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(file_bytes)
+        pool = get_pool()
+        # Two chunks per worker keeps cores busy without re-parsing the file too often
+        size = max(PAGES_PER_CHUNK, -(-total // (MAX_WORKERS * 2)))
+        chunks = [(start, min(start + size, total)) for start in range(0, total, size)]
+        futures = [pool.submit(_extract_range, path, start, stop) for start, stop in chunks]
+        try:
+            for (start, stop), future in zip(chunks, futures):
+                for offset, text in enumerate(future.result()):
+                    yield start + offset + 1, total, text
+        finally:
+            for future in futures: future.cancel()
+    finally:
+        os.remove(path)
+
+def extract_text(file_bytes, on_page=None, max_pages=MAX_PAGES, max_bytes=MAX_BYTES):
+    """
+    Returns the text of every page joined in order, separated by PAGE_BREAK.
+    `on_page(done, total)` is called after each page for progress reporting.
+    """
+    pages = []
+    for done, total, text in iter_pages(file_bytes, max_pages=max_pages, max_bytes=max_bytes):
+        pages.append(text)
+        if on_page: on_page(done, total)
+    return PAGE_BREAK.join(pages)
@@ -0,0 +1,74 @@
+import re
+import zlib
+import numpy as np
+from skill_matcher import get_matcher
+
+# --- PRE-RANKER SETTINGS ---
+N_FEATURES = 2 ** 18     # Hashed n-gram space (word unigrams + bigrams)
+SKILL_WEIGHT = 0.4       # Share of the final score from taxonomy skill overlap
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+def _feature_ids(text):
+    """
+    Hashes word unigrams and bigrams into N_FEATURES buckets.
+    CRC32 rather than hash(), which is salted per process: scores must be the same in every
+    process so a resumed batch run picks the same shortlist and stored pre-rank scores match.
+    """
+    tokens = _TOKEN.findall(text.lower())
+    grams = tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.int64, count=len(grams)) % N_FEATURES
+
+def _sparse_tf(texts):
+    """Builds a COO matrix (row ids, feature ids, sublinear tf) with one entry per distinct feature per document."""
+    ids = [_feature_ids(text) for text in texts]
+    if not ids:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+    rows = np.repeat(np.arange(len(ids), dtype=np.int64), [len(x) for x in ids])
+    # One sort over (row, feature) keys for the whole pool instead of one per document
+    keys, counts = np.unique(rows * N_FEATURES + np.concatenate(ids), return_counts=True)
+    return keys // N_FEATURES, keys % N_FEATURES, 1.0 + np.log(counts)
+
+def text_similarity(resume_texts, job_desc):
+    """Cosine similarity of hashed TF-IDF vectors, one sparse mat-vec over every resume at once."""
+    n = len(resume_texts)
+    if n == 0: return np.zeros(0)
+    rows, cols, tf = _sparse_tf(resume_texts)
+
+    df = np.bincount(cols, minlength=N_FEATURES)
+    idf = np.log((1 + n) / (1 + df)) + 1.0
+    weights = tf * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n))
+
+    jd_feats, jd_counts = np.unique(_feature_ids(job_desc), return_counts=True)
+    query = np.zeros(N_FEATURES)
+    query[jd_feats] = (1.0 + np.log(jd_counts)) * idf[jd_feats]
+    q_norm = np.linalg.norm(query)
+    if q_norm == 0: return np.zeros(n)
+
+    dots = np.bincount(rows, weights=weights * query[cols], minlength=n)
+    return np.divide(dots, norms * q_norm, out=np.zeros(n), where=norms > 0)
+
+def skill_overlap(resume_texts, job_desc):
+    """Fraction of the JD's taxonomy skills found in each resume."""
+    jd_skills = get_matcher().extract(job_desc)
+    if not jd_skills: return np.zeros(len(resume_texts))
+    # Scanning for only the JD's skills is much cheaper than the full taxonomy
+    matcher = get_matcher().subset(jd_skills)
+    index = {s: j for j, s in enumerate(jd_skills)}
+    hits = np.zeros((len(resume_texts), len(jd_skills)), dtype=bool)
+    for i, text in enumerate(resume_texts):
+        cols = [index[s] for s in matcher.extract(text) if s in index]
+        hits[i, cols] = True
+    return hits.mean(axis=1)
+
+def prerank(resume_texts, job_desc, skill_weight=SKILL_WEIGHT):
+    """Returns a 0-100 relevance score per resume; no LLM calls."""
+    score = (1 - skill_weight) * text_similarity(resume_texts, job_desc) + skill_weight * skill_overlap(resume_texts, job_desc)
+    return np.round(score * 100, 1)
+
+def shortlist(resume_texts, job_desc, top_k, skill_weight=SKILL_WEIGHT):
+    """Indices of the top_k resumes (best first) and the full score array."""
+    scores = prerank(resume_texts, job_desc, skill_weight=skill_weight)
+    k = min(top_k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k] if 0 < k < len(scores) else np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind='stable')].tolist(), scores
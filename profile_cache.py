@@ -0,0 +1,37 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+MAX_PROFILES = 128
+
+def content_hash(file_bytes):
+    return hashlib.sha256(file_bytes).hexdigest()
+
+class ProfileCache:
+    """
+    Bounded LRU of uploaded resumes: content hash -> {"text": ..., "category": ..., "pages": ...};
+    "category" stays None until a categorization call succeeds.
+    Shared by every session so a rerun (or a second recruiter) never re-parses the same PDF.
+    """
+    def __init__(self, maxsize=MAX_PROFILES):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_hash):
+        with self._lock:
+            profile = self._items.get(file_hash)
+            if profile is not None:
+                self._items.move_to_end(file_hash)
+            return profile
+
+    def put(self, file_hash, profile):
+        with self._lock:
+            self._items[file_hash] = profile
+            self._items.move_to_end(file_hash)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
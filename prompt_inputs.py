@@ -0,0 +1,206 @@
+import re
+from collections import Counter
+from functools import lru_cache
+import chat_context as cc
+
+# --- PROMPT INPUT BUDGETS ---
+# Tokens of (resume, job description) text sent with each prompt; None means the prompt has no JD
+PROMPT_BUDGETS = {
+    "ats_prompt": (1500, 800),
+    "authenticity_prompt": (1000, None),
+    "category_prompt": (400, None),
+    "cover_letter_prompt": (1200, 600),
+    "interview_prompt": (1200, 600),
+    "market_prompt": (500, None),
+    "roadmap_prompt": (1000, 600),
+    "email_prompt": (250, None),
+}
+DEFAULT_BUDGET = (1200, 600)
+
+# Resume sections each prompt needs most, best first; the rest follow only if the budget allows
+RESUME_PRIORITY = {
+    "ats_prompt": ("skills", "experience", "projects", "certifications", "education", "summary"),
+    "authenticity_prompt": ("experience", "summary", "projects", "skills", "education"),
+    "category_prompt": ("intro", "summary", "skills", "experience"),
+    "cover_letter_prompt": ("experience", "summary", "projects", "skills", "education"),
+    "interview_prompt": ("experience", "projects", "skills"),
+    "market_prompt": ("skills", "experience", "intro", "summary", "certifications"),
+    "roadmap_prompt": ("skills", "experience", "certifications", "education", "projects"),
+    "email_prompt": ("intro", "summary", "experience", "skills"),
+}
+JOB_PRIORITY = ("requirements", "responsibilities", "intro", "preferred", "about")
+DROPPED = {"interests", "references", "benefits", "eeo"}   # First to go when over budget
+
+RESUME_HEADINGS = {
+    "summary": ("summary", "profile", "professional summary", "career summary", "objective", "career objective",
+                "about me", "professional profile", "personal statement"),
+    "experience": ("experience", "work experience", "professional experience", "employment history", "work history",
+                   "employment", "career history", "relevant experience", "internships", "internship"),
+    "skills": ("skills", "technical skills", "key skills", "core skills", "core competencies", "competencies",
+               "technologies", "tech stack", "tools", "tools & technologies", "skills & tools",
+               "languages", "programming languages", "languages & frameworks", "languages & tools"),
+    "education": ("education", "academic background", "academics", "qualifications", "education & training"),
+    "projects": ("projects", "personal projects", "key projects", "academic projects", "selected projects"),
+    "certifications": ("certifications", "certificates", "licenses", "licenses & certifications", "courses", "training"),
+    "achievements": ("achievements", "awards", "honors", "honours", "accomplishments", "publications"),
+    "interests": ("interests", "hobbies", "hobbies & interests", "volunteering", "extracurricular activities"),
+    "references": ("references", "referees"),
+}
+JOB_HEADINGS = {
+    "requirements": ("requirements", "qualifications", "what you'll need", "what you need", "what we're looking for",
+                     "must have", "must haves", "skills", "required skills", "who you are", "minimum qualifications"),
+    "responsibilities": ("responsibilities", "what you'll do", "what you will do", "the role", "duties",
+                         "key responsibilities", "your role", "day to day"),
+    "preferred": ("nice to have", "preferred qualifications", "preferred", "bonus points", "bonus", "desirable"),
+    "about": ("about us", "about the company", "who we are", "company overview", "our mission", "about the team"),
+    "benefits": ("benefits", "perks", "what we offer", "compensation", "perks & benefits", "why join us"),
+    "eeo": ("equal opportunity", "equal employment opportunity", "diversity & inclusion", "eeo statement"),
+}
+
+_BULLET = re.compile(r"^[•●▪◦‣⁃∙·■➢–—*>-]+\s*")
+_CONTACT = re.compile(r"\S+@\S+\.\w+|https?://\S+|www\.\S+|(?:linkedin|github)\.com/\S*")
+# +44 20 7946 0958, (555) 123-4567, 555.123.4567, 9876543210: digit groups joined by one space, dot or hyphen
+_PHONE = re.compile(r"(?<![\w+])(?:\+\d{1,3}[ .-]?)?(?:\(\d{1,5}\)[ .-]?)?(?:\d{10,15}|\d{2,5}(?:[ .-]\d{2,5}){1,4})(?!\w)")
+_YEAR = re.compile(r"(?:19|20)\d\d")
+_BOILERPLATE = re.compile(r"^(references (are )?available( up)?on request|page \d+( of \d+)?|curriculum vitae|resume|cv)\.?$"
+                          r"|equal opportunity employer|regardless of (race|gender)", re.I)
+_HEADING_KEY = re.compile(r"[^a-z&' ]")
+_WORD = re.compile(r"[a-z][a-z0-9+#.]{2,}")
+_STOPWORDS = frozenset("the and for with you your our are will from that this have has who what all any can into "
+                       "about their they them able work working team years year using use used etc".split())
+PAGE_BREAK = "\f"   # pdf_extract.PAGE_BREAK separates pages with this
+PAGE_EDGE = 2       # Lines at the top and bottom of a page that may be a header/footer
+REPEAT_LIMIT = 3    # A short line at the edge of this many pages (or of every page) is a header/footer
+
+def _aliases(headings):
+    return {alias: name for name, aliases in headings.items() for alias in aliases}
+
+_RESUME_ALIASES = _aliases(RESUME_HEADINGS)
+_JOB_ALIASES = _aliases(JOB_HEADINGS)
+
+def _strip_phone(match):
+    # Ten to fifteen digits, and not a run of years such as "2016 2018 2020"
+    phone = match.group()
+    digits = sum(ch.isdigit() for ch in phone)
+    groups = re.findall(r"\d+", phone)
+    if not 10 <= digits <= 15 or all(_YEAR.fullmatch(g) for g in groups): return phone
+    return " "
+
+def _page_furniture(pages):
+    """Short lines repeated at the top or bottom of several pages: running headers and footers."""
+    if len(pages) < 2: return frozenset()
+    seen = Counter()
+    for lines in pages:
+        seen.update({line for line in lines[:PAGE_EDGE] + lines[-PAGE_EDGE:] if len(line.split()) <= 8})
+    needed = min(REPEAT_LIMIT, len(pages))
+    return frozenset(line for line, count in seen.items() if count >= needed)
+
+def normalize(text, lossy=False):
+    """
+    Collapses whitespace and unifies bullets. With `lossy`, also drops contact details,
+    page furniture ("Page 2 of 3") and headers/footers repeated across page breaks.
+    """
+    pages = []
+    for page in (text or "").split(PAGE_BREAK):
+        lines = []
+        for raw in page.splitlines():
+            line = _PHONE.sub(_strip_phone, _CONTACT.sub(" ", raw)) if lossy else raw
+            line = " ".join(line.split())
+            if _BULLET.match(line): line = "- " + _BULLET.sub("", line)
+            if len(line.strip("-|,;:/ ")) < 2 or (lossy and _BOILERPLATE.search(line)): continue
+            lines.append(line)
+        pages.append(lines)
+    furniture = _page_furniture(pages) if lossy else frozenset()
+    return [line for lines in pages for line in lines if line not in furniture]
+
+def _heading(line, aliases):
+    """(section, rest of line) if the line opens a section, e.g. 'SKILLS' or 'Skills: Python, SQL'."""
+    head, sep, rest = line.partition(":")
+    key = " ".join(_HEADING_KEY.sub("", head.lower().replace("’", "'")).split())
+    if key in aliases:
+        return aliases[key], rest.strip() if sep else ""
+    return None
+
+@lru_cache(maxsize=64)
+def split_sections(text, kind="resume", lossy=False):
+    """
+    Normalized text (see normalize) as a tuple of (section, heading, lines) in document order.
+    Text before the first recognised heading is the 'intro' (name and title, or the whole
+    text when there are no headings). Repeated headings are merged into one section.
+    """
+    aliases = _RESUME_ALIASES if kind == "resume" else _JOB_ALIASES
+    sections, order = {}, []
+    current, heading = "intro", None
+    for line in normalize(text, lossy):
+        found = _heading(line, aliases)
+        if found:
+            current, rest = found
+            if current not in sections:
+                sections[current] = (line.split(":")[0].strip(), [])
+                order.append(current)
+            if rest: sections[current][1].append(rest)
+            continue
+        if current not in sections:
+            sections[current] = (heading, [])
+            order.append(current)
+        sections[current][1].append(line)
+    return tuple((name, sections[name][0], tuple(sections[name][1])) for name in order)
+
+def _terms(text):
+    return frozenset(w.strip(".") for w in _WORD.findall((text or "").lower())) - _STOPWORDS
+
+def _render(name, heading, lines):
+    return "\n".join(([heading] if heading else []) + list(lines))
+
+def _total(sections):
+    return sum(cc.estimate_tokens(_render(*s)) + 1 for s in sections)
+
+def _select(text, kind, priority, budget, focus_terms):
+    """
+    Fills `budget` tokens with whole sections in priority order, then the most relevant lines of the next one.
+    Text that fits is sent whole; contact details, page furniture and DROPPED sections are only
+    left out when it does not.
+    """
+    sections = split_sections(text, kind)
+    if budget is None or _total(sections) <= budget:
+        return "\n\n".join(_render(*s) for s in sections)
+    sections = [s for s in split_sections(text, kind, lossy=True) if s[0] not in DROPPED]
+    if _total(sections) <= budget:
+        return "\n\n".join(_render(*s) for s in sections)
+
+    rank = {name: i for i, name in enumerate(priority)}
+    ordered = sorted(range(len(sections)), key=lambda i: (rank.get(sections[i][0], len(priority)), i))
+    chosen, left = {}, budget
+    for i in ordered:
+        name, heading, lines = sections[i]
+        cost = cc.estimate_tokens(_render(name, heading, lines)) + 1
+        if cost <= left:
+            chosen[i], left = lines, left - cost
+            continue
+        # Partial section: lines sharing the most terms with the focus text, earlier lines on ties
+        left -= cc.estimate_tokens(heading or "")
+        scored = sorted(range(len(lines)), key=lambda j: (-len(_terms(lines[j]) & focus_terms), j))
+        keep = []
+        for j in scored:
+            cost = cc.estimate_tokens(lines[j]) + 1
+            if cost <= left:
+                keep.append(j)
+                left -= cost
+        if keep: chosen[i] = tuple(lines[j] for j in sorted(keep))
+        if left <= 0: break
+    return "\n\n".join(_render(sections[i][0], sections[i][1], chosen[i]) for i in sorted(chosen))
+
+def fit_resume(prompt_name, resume_text, focus=""):
+    """
+    Resume text for `prompt_name`, within its token budget: the sections that prompt needs most,
+    whole where they fit; lines of a section that does not fit are ranked by overlap with `focus`
+    (the job description or role).
+    """
+    budget = PROMPT_BUDGETS.get(prompt_name, DEFAULT_BUDGET)[0]
+    priority = RESUME_PRIORITY.get(prompt_name, RESUME_PRIORITY["ats_prompt"])
+    return _select(resume_text or "", "resume", priority, budget, _terms(focus))
+
+def fit_job(prompt_name, job_desc):
+    """Job description for `prompt_name`: requirements and responsibilities first, benefits and EEO text dropped."""
+    budget = PROMPT_BUDGETS.get(prompt_name, DEFAULT_BUDGET)[1] or DEFAULT_BUDGET[1]
+    return _select(job_desc or "", "job", JOB_PRIORITY, budget, frozenset())
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import advanced_features as af
+
+MAX_REPORTS = 64      # Rendered PDFs kept in memory
+RENDER_WORKERS = 2    # Background FPDF renders at once
+
+def report_key(*args):
+    """Hash of every input to generate_pdf_report; equal analyses share one rendered PDF."""
+    return hashlib.sha256(json.dumps(args, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+class ReportCache:
+    """
+    Bounded LRU of rendered PDF reports: report_key -> bytes.
+    prefetch() starts a render in the background; get() serves cached bytes, waits for a pending
+    render, or renders inline as a last resort. Shared by every session.
+    """
+    def __init__(self, maxsize=MAX_REPORTS, workers=RENDER_WORKERS):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nexhire-report")
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.render_ms_total = 0.0
+        self.last_render_ms = 0.0
+
+    def _render(self, key, args):
+        start = time.perf_counter()
+        try:
+            data = bytes(af.generate_pdf_report(*args))
+        except Exception:
+            with self._lock:
+                self._pending.pop(key, None)
+            raise
+        elapsed = (time.perf_counter() - start) * 1000
+        # One lock for both, so a get() never finds the key in neither and renders it again
+        with self._lock:
+            self._pending.pop(key, None)
+            self.renders += 1
+            self.render_ms_total += elapsed
+            self.last_render_ms = elapsed
+            self._items[key] = data
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return data
+
+    def prefetch(self, *args):
+        """Queues a background render for these generate_pdf_report arguments; returns the key."""
+        key = report_key(*args)
+        with self._lock:
+            if key not in self._items and key not in self._pending:
+                self._pending[key] = self._pool.submit(self._render, key, args)
+        return key
+
+    def get(self, *args):
+        """PDF bytes for these generate_pdf_report arguments."""
+        key = report_key(*args)
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+            pending = self._pending.get(key)
+        if pending is not None:
+            return pending.result()
+        return self._render(key, args)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._items), "pending": len(self._pending), "hits": self.hits, "misses": self.misses,
+                    "renders": self.renders, "avg_render_ms": round(self.render_ms_total / self.renders, 1) if self.renders else 0.0,
+                    "last_render_ms": round(self.last_render_ms, 1)}
@@ -0,0 +1,164 @@
+import sqlite3
+import hashlib
+import json
+import os
+import threading
+import time
+
+import database as db
+
+# --- CACHE SETTINGS ---
+CACHE_FILE = 'nexhire_cache.db'
+MAX_ENTRIES = 5000
+DEFAULT_TTL = 7 * 24 * 3600
+FLUSH_EVERY = 100      # Buffered lookups before access times and stats are written
+FLUSH_INTERVAL = 30    # ...or seconds since the last write, whichever comes first
+
+# Per-prompt time-to-live in seconds. 0 disables caching for that prompt.
+PROMPT_TTLS = {
+    "market_prompt": 24 * 3600,   # Salary trends drift, refresh daily
+    "email_prompt": 24 * 3600,
+    "chat": 0,                    # Conversations are never replayed
+}
+
+def default_cache_path(db_path):
+    """Places the cache file in the same folder as the main database."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), CACHE_FILE)
+
+def make_key(prompt_name, model, generation_config, contents):
+    """Content-addressed key: identical prompt + model + config + input -> identical key."""
+    payload = json.dumps(
+        [prompt_name, model, generation_config or {}, contents],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """
+    Disk-backed LRU cache for LLM responses.
+    Entries expire per prompt (PROMPT_TTLS) and the table is capped at max_entries,
+    evicting the least recently used rows first.
+    Lookups never write: access times and hit/miss counts are buffered and
+    flushed in one transaction (see flush()).
+    """
+    def __init__(self, path, max_entries=MAX_ENTRIES, ttls=None, default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = PROMPT_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._touched = {}     # key -> last access time not yet written
+        self._counts = {}      # prompt_name -> [hits, misses] not yet written
+        self._pending = 0
+        self._flushed_at = time.time()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        for pragma in db.PRAGMAS:
+            self._conn.execute(pragma)
+        c = self._conn.cursor()
+        c.execute('''CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        prompt_name TEXT,
+                        value TEXT,
+                        created REAL,
+                        last_access REAL
+                    )''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)')
+        c.execute('CREATE TABLE IF NOT EXISTS stats(prompt_name TEXT PRIMARY KEY, hits INTEGER DEFAULT 0, misses INTEGER DEFAULT 0)')
+        self._conn.commit()
+
+    def ttl_for(self, prompt_name):
+        return self.ttls.get(prompt_name, self.default_ttl)
+
+    def _count(self, prompt_name, hit):
+        counts = self._counts.setdefault(prompt_name, [0, 0])
+        counts[0 if hit else 1] += 1
+        self._pending += 1
+
+    def _write_pending(self, c):
+        """Writes buffered access times and stats. Caller holds the lock and commits."""
+        if self._touched:
+            c.executemany('UPDATE responses SET last_access=? WHERE key=?',
+                          [(at, key) for key, at in self._touched.items()])
+        if self._counts:
+            c.executemany('''INSERT INTO stats(prompt_name, hits, misses) VALUES (?, ?, ?)
+                             ON CONFLICT(prompt_name) DO UPDATE SET
+                                 hits = hits + excluded.hits, misses = misses + excluded.misses''',
+                          [(name, hits, misses) for name, (hits, misses) in self._counts.items()])
+        self._touched.clear()
+        self._counts.clear()
+        self._pending = 0
+        self._flushed_at = time.time()
+
+    def _maybe_flush(self, now):
+        if self._pending >= FLUSH_EVERY or now - self._flushed_at >= FLUSH_INTERVAL:
+            self._write_pending(self._conn.cursor())
+            self._conn.commit()
+
+    def flush(self):
+        """Writes buffered access times and hit/miss counts in one transaction."""
+        with self._lock:
+            if self._pending:
+                self._write_pending(self._conn.cursor())
+                self._conn.commit()
+
+    def get(self, key, prompt_name):
+        """Returns the cached text, or None on a miss / expired entry."""
+        ttl = self.ttl_for(prompt_name)
+        if ttl <= 0: return None
+        now = time.time()
+        with self._lock:
+            c = self._conn.cursor()
+            c.execute('SELECT value, created FROM responses WHERE key=?', (key,))
+            row = c.fetchone()
+            if row and now - row[1] <= ttl:
+                self._touched[key] = now
+                self._count(prompt_name, hit=True)
+                self._maybe_flush(now)
+                return row[0]
+            if row:
+                # Rare: expired rows are removed right away so set() can replace them cleanly
+                self._touched.pop(key, None)
+                c.execute('DELETE FROM responses WHERE key=?', (key,))
+                self._conn.commit()
+            self._count(prompt_name, hit=False)
+            self._maybe_flush(now)
+            return None
+
+    def set(self, key, prompt_name, value):
+        if self.ttl_for(prompt_name) <= 0 or value is None: return
+        now = time.time()
+        with self._lock:
+            c = self._conn.cursor()
+            # Buffered access times go in first so the LRU cap below sees real recency
+            self._touched.pop(key, None)
+            self._write_pending(c)
+            c.execute('INSERT OR REPLACE INTO responses(key, prompt_name, value, created, last_access) VALUES (?,?,?,?,?)',
+                      (key, prompt_name, value, now, now))
+            # LRU cap: drop everything past the newest max_entries rows
+            c.execute('''DELETE FROM responses WHERE key IN (
+                            SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                         )''', (self.max_entries,))
+            self._conn.commit()
+
+    def stats(self):
+        """Returns {prompt_name: {"hits": n, "misses": n}} plus the current entry count."""
+        with self._lock:
+            c = self._conn.cursor()
+            if self._pending:
+                self._write_pending(c)
+                self._conn.commit()
+            c.execute('SELECT prompt_name, hits, misses FROM stats ORDER BY prompt_name')
+            per_prompt = {name: {"hits": hits, "misses": misses} for name, hits, misses in c.fetchall()}
+            c.execute('SELECT COUNT(*) FROM responses')
+            entries = c.fetchone()[0]
+        return {"entries": entries, "prompts": per_prompt}
+
+    def clear(self):
+        with self._lock:
+            c = self._conn.cursor()
+            c.execute('DELETE FROM responses')
+            c.execute('DELETE FROM stats')
+            self._conn.commit()
+            self._touched.clear()
+            self._counts.clear()
+            self._pending = 0
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import ai_engine as ai
+import database as db
+import write_behind
+
+# --- JOB SETTINGS ---
+JOB_WORKERS = 4       # Full scans running at once; each fans out to one thread per stage
+POLL_INTERVAL = 1.0   # Seconds between UI refreshes while a job runs
+HEARTBEAT = 5.0       # Seconds between "still working" stamps on this process's jobs
+STALE_AFTER = 30.0    # A queued/running job without a heartbeat this long is taken over
+
+def input_hash(job_role, resume_text, job_desc):
+    return hashlib.sha256(json.dumps([job_role, resume_text, job_desc]).encode('utf-8')).hexdigest()
+
+class JobCancelled(Exception):
+    pass
+
+class LiveJob:
+    """What only the running worker knows: draft text streamed so far, and the cancel flag."""
+    def __init__(self):
+        self.drafts = {}      # stage label -> text so far
+        self.cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_chunk(self, label, chunk):
+        with self._lock:
+            self.drafts[label] = self.drafts.get(label, "") + chunk
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.drafts)
+
+class ScanJobManager:
+    """
+    Runs full scans in the background, off the Streamlit script thread. Shared by every session.
+    Jobs and each finished stage are stored in SQLite, so a page refresh (or another session of the
+    same user) reattaches by job id, and a job orphaned by a restart is resumed from its last
+    finished stage by the next process to notice it.
+    """
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nexhire-job")
+        self._live = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.reattached = 0
+        self.resumed = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.resume_stale()
+        threading.Thread(target=self._beat, name="nexhire-job-heartbeat", daemon=True).start()
+
+    def submit(self, username, job_role, resume_text, job_desc, category=None):
+        """Queues a full scan and returns its job id; the same scan already in progress is reattached instead."""
+        digest = input_hash(job_role, resume_text, job_desc)
+        job_id = db.find_active_scan_job(username, digest)
+        if job_id:
+            self.reattached += 1
+            return job_id
+        job_id = uuid.uuid4().hex
+        db.create_scan_job(job_id, username, job_role, category, resume_text, job_desc, digest, time.time())
+        self.submitted += 1
+        self._start(job_id)
+        return job_id
+
+    def status(self, job_id, username=None):
+        """
+        The job as stored (see db.get_scan_job) plus 'done' / 'total' stage counts and 'drafts',
+        the streamed text of unfinished stages. None if unknown or owned by another user.
+        """
+        job = db.get_scan_job(job_id)
+        if job is None or (username and job['username'] != username): return None
+        live = self._live.get(job_id)
+        job['drafts'] = live.snapshot() if live else {}
+        job['done'], job['total'] = len(job['stages']), len(ai.SCAN_STAGES)
+        return job
+
+    def active_job(self, username):
+        return db.find_active_scan_job(username)
+
+    def cancel(self, job_id):
+        """
+        Stops a job. A job running in another process sees the stored status at its next
+        heartbeat and stops there; until then its drafts keep streaming.
+        """
+        live = self._live.get(job_id)
+        if live: live.cancel.set()
+        else: db.set_scan_job_status(job_id, 'cancelled')
+
+    def resume_stale(self):
+        """Restarts jobs whose worker went away; their finished stages are not run again."""
+        now = time.time()
+        try: claimed = db.claim_stale_scan_jobs(now - STALE_AFTER, now)
+        except Exception: return
+        for job_id in claimed:
+            self.resumed += 1
+            self._start(job_id)
+
+    def stats(self):
+        return {"workers": self.workers, "running": len(self._live), "submitted": self.submitted, "reattached": self.reattached,
+                "resumed": self.resumed, "completed": self.completed, "failed": self.failed, "cancelled": self.cancelled}
+
+    def _start(self, job_id):
+        with self._lock:
+            if job_id in self._live: return
+            live = self._live[job_id] = LiveJob()
+        self._pool.submit(self._run, job_id, live)
+
+    def _beat(self):
+        while True:
+            time.sleep(HEARTBEAT)
+            try:
+                for job_id in db.touch_scan_jobs(list(self._live), time.time()):
+                    # Cancelled (or otherwise finished) by another process
+                    live = self._live.get(job_id)
+                    if live: live.cancel.set()
+                self.resume_stale()
+            except Exception:
+                # The next beat tries again; a missed one only matters after STALE_AFTER
+                pass
+
+    def _run(self, job_id, live):
+        def check_cancelled(*args):
+            # Raised on the job thread; run_full_scan then abandons the remaining stages
+            if live.cancel.is_set(): raise JobCancelled()
+
+        def on_chunk(label, chunk):
+            check_cancelled()
+            live.add_chunk(label, chunk)
+
+        # Only successful stages are checkpointed, so a resumed job retries the ones that fell back
+        fallbacks = {}
+        def on_stage(name, result):
+            if ai.stage_succeeded(name, result): db.save_scan_stage(job_id, name, result)
+            else: fallbacks[name] = result
+
+        try:
+            job = db.get_scan_job(job_id)
+            if job is None or job['status'] not in db.ACTIVE_JOB_STATUSES: return
+            check_cancelled()
+            db.set_scan_job_status(job_id, 'running')
+            completed = {name: result for name, result in job['stages'].items() if ai.stage_succeeded(name, result)}
+            scan = ai.run_full_scan(job['resume_text'], job['job_desc'], job['job_role'], on_progress=check_cancelled,
+                                    on_chunk=on_chunk, on_stage=on_stage, completed=completed)
+            # The finished job is rebuilt from its stages, fallbacks included
+            for name, result in fallbacks.items(): db.save_scan_stage(job_id, name, result)
+            ats_failed = 'ats' in fallbacks
+            note = "The ATS analysis failed, so this scan was not saved to history." if ats_failed else None
+            if not db.set_scan_job_status(job_id, 'complete', note):
+                # Cancelled from another process after the last heartbeat
+                self.cancelled += 1
+                return
+            if not ats_failed:
+                # Queued: the writer thread commits these off the job thread
+                write_behind.save_scan(job['username'], job['job_role'], scan['score'])
+                write_behind.save_full_analysis(job['username'], job['job_role'], job['resume_text'], job['job_desc'], scan['score'], scan['feedback'],
+                                                scan['cover_letter'], scan['interview_q'], scan['market_analysis'], scan['roadmap'])
+            self.completed += 1
+        except JobCancelled:
+            db.set_scan_job_status(job_id, 'cancelled')
+            self.cancelled += 1
+        except Exception as e:
+            db.set_scan_job_status(job_id, 'failed', str(e)[:500])
+            self.failed += 1
+        finally:
+            with self._lock: self._live.pop(job_id, None)
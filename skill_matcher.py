@@ -0,0 +1,119 @@
+import json
+import os
+import re
+import threading
+
+DEFAULT_TAXONOMY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skill_taxonomy.json')
+TAXONOMY_PATH = os.environ.get('NEXHIRE_SKILL_TAXONOMY', DEFAULT_TAXONOMY)
+
+# A skill must not be glued to other word characters ("c" inside "cloud", "go" inside "google")
+# or to the symbols that continue a name ("c" in "c++", "r" in "r&d").
+_LEFT = r'(?<![\w+#&])'
+_RIGHT = r'(?![\w+#&])'
+
+def load_taxonomy(path=TAXONOMY_PATH):
+    """
+    Reads a taxonomy file: either {"skills": [...]} or a bare list.
+    Each skill is a name string or {"name", "aliases", "case_sensitive", "category"}.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    skills = data.get("skills", []) if isinstance(data, dict) else data
+    return [{"name": s} if isinstance(s, str) else s for s in skills]
+
+def _normalize(term):
+    return " ".join(term.split())
+
+def _trie_pattern(terms):
+    """Compiles terms into a prefix-shared regex so matching cost tracks text length, not taxonomy size."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        branches = []
+        for ch in sorted(k for k in node if k):
+            piece = r'\s+' if ch == ' ' else re.escape(ch)
+            branches.append(piece + build(node[ch]))
+        if not branches: return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Optional tail keeps the longest alias first, falling back to the shorter one
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+class SkillMatcher:
+    """
+    Single-pass skill matcher compiled from a taxonomy.
+    Aliases resolve to canonical names; case_sensitive terms ("Go", "R") only match exact casing.
+    """
+    def __init__(self, skills):
+        self.entries = list(skills)
+        self.skills = {}
+        self._insensitive = {}
+        self._sensitive = {}
+        for entry in skills:
+            name = entry["name"]
+            self.skills[name] = entry.get("category", "General")
+            exact = {_normalize(t) for t in entry.get("case_sensitive", [])}
+            for term in [name] + entry.get("aliases", []):
+                term = _normalize(term)
+                if term in exact:
+                    self._sensitive[term] = name
+                else:
+                    self._insensitive.setdefault(term.lower(), name)
+
+        # Case-insensitive terms go first so "Spring Boot" wins over the exact-case "Spring"
+        alternatives = []
+        if self._insensitive:
+            alternatives.append('(?P<ci>' + _trie_pattern(self._insensitive) + ')')
+        if self._sensitive:
+            alternatives.append('(?P<cs>(?-i:' + _trie_pattern(self._sensitive) + '))')
+        self.pattern = re.compile(_LEFT + '(?:' + '|'.join(alternatives) + ')' + _RIGHT, re.IGNORECASE) if alternatives else None
+
+    @classmethod
+    def from_file(cls, path=TAXONOMY_PATH):
+        return cls(load_taxonomy(path))
+
+    def __len__(self):
+        return len(self.skills)
+
+    def subset(self, names):
+        """A smaller matcher for just these canonical skills (e.g. the ones a JD asks for)."""
+        names = set(names)
+        return SkillMatcher([e for e in self.entries if e["name"] in names])
+
+    def match(self, text):
+        """
+        Returns one entry per canonical skill found, in order of first appearance:
+        {"skill": name, "category": ..., "count": n, "positions": [(start, end), ...]}
+        """
+        if not text or self.pattern is None: return []
+        found = {}
+        for m in self.pattern.finditer(text):
+            term = _normalize(m.group())
+            name = self._sensitive[term] if m.lastgroup == 'cs' else self._insensitive[term.lower()]
+            hit = found.get(name)
+            if hit is None:
+                hit = found[name] = {"skill": name, "category": self.skills[name], "count": 0, "positions": []}
+            hit["count"] += 1
+            hit["positions"].append(m.span())
+        return list(found.values())
+
+    def extract(self, text):
+        """Canonical skill names only, in order of first appearance."""
+        return [hit["skill"] for hit in self.match(text)]
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+def get_matcher(path=TAXONOMY_PATH):
+    """Compiles each taxonomy file once per process."""
+    with _matchers_lock:
+        matcher = _matchers.get(path)
+        if matcher is None:
+            matcher = _matchers[path] = SkillMatcher.from_file(path)
+        return matcher
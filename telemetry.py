@@ -0,0 +1,108 @@
+import datetime
+import threading
+import time
+from collections import deque
+import numpy as np
+import database as db
+import write_behind
+import chat_context as cc
+
+# Percentiles shown in the admin console
+PERCENTILES = (50, 95, 99)
+RECENT_CALLS = 200      # Successful calls per prompt kept in memory for hedging decisions
+PERCENTILE_SAMPLE = 5000  # Newest successful calls per prompt the report's percentiles are computed from
+RETENTION_DAYS = 30     # llm_calls rows older than this are deleted (the widest report window)
+PRUNE_EVERY = 3600      # Seconds between retention passes
+SUCCESS = ('ok', 'hedged')
+
+_recent = {}
+_recent_lock = threading.Lock()
+_last_prune = 0.0
+
+def recent_percentile(prompt_name, percentile, min_samples=1, ttft=False):
+    """
+    Latency percentile (ms) of this process's recent successful calls for `prompt_name`:
+    total duration for blocking calls, time to first chunk for streams (`ttft`).
+    None until `min_samples` calls have been seen.
+    """
+    with _recent_lock:
+        samples = list(_recent.get((prompt_name, ttft), ()))
+    if len(samples) < max(min_samples, 1): return None
+    return float(np.percentile(samples, percentile))
+
+def estimate_input_tokens(contents):
+    if isinstance(contents, str): return cc.estimate_tokens(contents)
+    try: return cc.content_tokens(contents)
+    except (TypeError, KeyError, AttributeError): return cc.estimate_tokens(str(contents))
+
+def usage_tokens(response):
+    """(input, output) token counts reported by Gemini, or (None, None)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None: return None, None
+    return getattr(usage, "prompt_token_count", None) or None, getattr(usage, "candidates_token_count", None) or None
+
+def record_call(prompt_name, started, status, key_id=None, retries=0, contents=None, response=None,
+                output_text=None, error=None, ttft=None):
+    """
+    Queues one llm_calls row. `started` and `ttft` are time.perf_counter() values; `retries` is the
+    number of 429 responses the call moved past, whatever its final status.
+    Token counts come from the response's usage metadata when present, else from a length estimate.
+    """
+    now = time.perf_counter()
+    if status in SUCCESS:
+        sample = (ttft if ttft else now) - started
+        with _recent_lock:
+            _recent.setdefault((prompt_name, bool(ttft)), deque(maxlen=RECENT_CALLS)).append(sample * 1000)
+    input_tokens, output_tokens = usage_tokens(response)
+    if input_tokens is None and contents is not None:
+        input_tokens = estimate_input_tokens(contents)
+    if output_tokens is None and output_text:
+        output_tokens = cc.estimate_tokens(output_text)
+    writer = write_behind.get_writer()
+    _prune(writer)
+    writer.submit(
+        db.insert_llm_call, db.timestamp(), prompt_name, status, round((now - started) * 1000, 1),
+        round((ttft - started) * 1000, 1) if ttft else None, input_tokens, output_tokens or 0,
+        key_id, retries, str(error)[:500] if error else None)
+
+def _since(days):
+    return (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+def _prune(writer):
+    # At most once per PRUNE_EVERY, queued behind the inserts
+    global _last_prune
+    now = time.monotonic()
+    with _recent_lock:
+        if _last_prune and now - _last_prune < PRUNE_EVERY: return
+        _last_prune = now
+    writer.submit(db.delete_llm_calls_before, _since(RETENTION_DAYS))
+
+def latency_report(days=7):
+    """
+    Per-prompt rows for the admin console, slowest p95 first: call counts, latency percentiles,
+    time to first token, token burn and its share of the total, 429 retries, hedged calls,
+    deadline timeouts and errors. Counts and sums are aggregated in SQL; percentiles come from
+    the newest PERCENTILE_SAMPLE successful calls of each prompt, so the cost stays flat as the table grows.
+    """
+    since = _since(days)
+    rows = db.summarize_llm_calls(since)
+    total_tokens = sum(row[3] + row[4] for row in rows) or 1
+    report = []
+    for prompt_name, calls, avg_ttft, tokens_in, tokens_out, retries, hedged, timeouts, errors in rows:
+        durations = np.array([d for d in db.fetch_llm_durations(prompt_name, since, SUCCESS, PERCENTILE_SAMPLE) if d is not None])
+        entry = {"Prompt": prompt_name, "Calls": calls}
+        for p in PERCENTILES:
+            entry[f"p{p} ms"] = round(float(np.percentile(durations, p)), 1) if durations.size else None
+        entry.update({
+            "Avg TTFT ms": round(avg_ttft, 1) if avg_ttft is not None else None,
+            "Input Tokens": int(tokens_in),
+            "Output Tokens": int(tokens_out),
+            "Token Share %": round((tokens_in + tokens_out) / total_tokens * 100, 1),
+            "429 Retries": int(retries),
+            "Hedged": hedged,
+            "Timeouts": timeouts,
+            "Errors": errors,
+        })
+        report.append(entry)
+    report.sort(key=lambda entry: entry["p95 ms"] or 0, reverse=True)
+    return report
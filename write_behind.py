@@ -0,0 +1,132 @@
+import atexit
+import queue
+import threading
+import time
+import database as db
+
+# --- WRITER SETTINGS ---
+FLUSH_INTERVAL = 0.5   # Seconds the writer waits to gather events into one transaction
+MAX_BATCH = 200        # Events committed per transaction at most
+CLOSE_TIMEOUT = 10.0   # How long shutdown waits for the queue to drain
+
+class WriteBehindQueue:
+    """
+    Background writer for persistence events.
+    Callers enqueue and return immediately; one thread commits everything queued within
+    FLUSH_INTERVAL in a single transaction, so concurrent sessions never wait on the write lock or fsync.
+    """
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        self._thread = threading.Thread(target=self._run, name="nexhire-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        """Queues fn(cursor, *args) to run inside the writer's next transaction."""
+        if self._closed:
+            # After shutdown there is no writer thread; fall back to a synchronous write
+            self._write([(fn, args, None)])
+            return
+        self._queue.put((fn, args, None))
+
+    def flush(self, timeout=None):
+        """Blocks until everything queued before this call is committed."""
+        done = threading.Event()
+        self._queue.put((None, (), done))
+        return done.wait(timeout)
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {"depth": self.depth(), "written": self.written, "failed": self.failed,
+                "batches": self.batches, "last_flush_ms": round(self.last_flush_ms, 1)}
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Drains the queue and stops the writer; registered with atexit."""
+        if self._closed: return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None: return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            # Gather whatever arrives within the flush interval; a flush marker cuts the wait short
+            while len(batch) < self.max_batch and batch[-1][2] is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                try: item = self._queue.get(timeout=remaining)
+                except queue.Empty: break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch):
+        events = [(fn, args) for fn, args, _ in batch if fn is not None]
+        if events:
+            start = time.perf_counter()
+            with self._lock:
+                try:
+                    self._commit(events)
+                except Exception:
+                    # One bad event must not take the rest of the batch with it
+                    for event in events:
+                        try: self._commit([event])
+                        except Exception: self.failed += 1
+                self.batches += 1
+                self.last_flush_ms = (time.perf_counter() - start) * 1000
+        for _, _, done in batch:
+            if done is not None: done.set()
+
+    def _commit(self, events):
+        conn = db.get_connection()
+        try:
+            c = conn.cursor()
+            for fn, args in events:
+                fn(c, *args)
+            conn.commit()
+            self.written += len(events)
+        finally:
+            conn.close()
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_writer():
+    """One writer thread per database file, shared by every session."""
+    with _writers_lock:
+        writer = _writers.get(db.DB_PATH)
+        if writer is None:
+            writer = _writers[db.DB_PATH] = WriteBehindQueue()
+        return writer
+
+@atexit.register
+def close_all():
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.close()
+
+# --- QUEUED VERSIONS OF THE database.save_* CALLS ---
+# Timestamps are taken at submit time, so history order matches what users did.
+
+def save_scan(username, job_role, score):
+    get_writer().submit(db.insert_scan, username, job_role, score, db.timestamp())
+
+def save_full_analysis(username, job_role, resume_text, job_desc, score, feedback, cover_letter, interview_questions, market_analysis, roadmap):
+    get_writer().submit(db.insert_full_analysis, username, job_role, resume_text, job_desc, score, feedback,
+                        cover_letter, interview_questions, market_analysis, roadmap, db.timestamp())